@@ -1,6 +1,10 @@
 import numpy as np
 import math
-from math_core import PolynomialUtils, PoleUtils
+from functools import lru_cache
+from math_core import Polynomial, PoleUtils, MatrixUtils
+import profiler
+
+SINGULAR_MSG = "设计失败：Sylvester矩阵奇异。\n原因可能是：\n1. 被控对象存在零极点对消\n2. 系统不可控或不可观"
 
 def count_integrators(den: list) -> int:
     cnt = 0
@@ -9,17 +13,13 @@ def count_integrators(den: list) -> int:
         else: break
     return cnt
 
-def design_controller(num, den, mp, ts, input_type='step'):
-    """
-    Diophantine 方程求解器 (含数值保护)
-    返回: B_final, A_final, r_add, zeta, wn, A_cl (期望特征多项式)
-    """
-    
-    # --- 1. 极点计算 (显式处理临界阻尼，消除 Magic Number) ---
+def desired_poles(mp, ts):
+    """由超调量/调节时间计算主导极点，返回 zeta, wn, desired_pole"""
+    # --- 极点计算 (显式处理临界阻尼，消除 Magic Number) ---
     if mp <= 1e-6:
         # 临界阻尼或过阻尼情况 (zeta=1)
         zeta = 1.0
-        wn = 5.834 / ts 
+        wn = 5.834 / ts
         p_real = -wn
         p_imag = 0.0
     else:
@@ -31,65 +31,161 @@ def design_controller(num, den, mp, ts, input_type='step'):
         # 防止 1-zeta^2 < 0 的微小浮点误差
         sqrt_term = max(0.0, 1.0 - zeta**2)
         p_imag = wn * math.sqrt(sqrt_term)
-        
-    desired_pole = complex(p_real, p_imag)
-    
-    # --- 2. 积分器增强 ---
-    req_type = 2 if input_type == 'ramp' else 1
-    cur_type = count_integrators(den)
-    r_add = max(0, req_type - cur_type)
-    
-    s_term = [1.0]
-    for _ in range(r_add):
-        s_term = PolynomialUtils.multiply(s_term, [0.0, 1.0])
-    Dp_ext = PolynomialUtils.multiply(den, s_term)
-    
-    # --- 3. 期望特征多项式构建 ---
-    n_ext = len(Dp_ext) - 1
-    deg_ctrl = n_ext - 1
-    total_order = n_ext + deg_ctrl
-    
-    complex_poles = PoleUtils.conjugate_pair([desired_pole])
-    A_cl = [1.0]
-    for p in complex_poles:
-        A_cl = PolynomialUtils.multiply(A_cl, [-p, 1.0])
-    A_cl = [c.real for c in A_cl]
+
+    return zeta, wn, complex(p_real, p_imag)
+
+def desired_closed_loop_poles(zeta, wn, desired_pole, total_order, far_ratio=10.0, far_spacing=0.15):
+    """
+    期望闭环极点：主导共轭极点 + 分散远极点，补足到 total_order 个
+    far_ratio: 远极点相对主导极点实部的倍数；far_spacing: 相邻远极点的相对间隔
+    """
+    poles = PoleUtils.conjugate_pair([desired_pole])
 
     dom_real_abs = abs(zeta * wn)
-    if dom_real_abs < 1e-6: dom_real_abs = 1.0 
-    far_pole_base = max(10.0, 10.0 * dom_real_abs)
-    
+    if dom_real_abs < 1e-6: dom_real_abs = 1.0
+    far_pole_base = max(far_ratio, far_ratio * dom_real_abs)
+
     # 分散远极点 (防止 Jordan 块导致的数值奇异)
-    idx = 0
-    while len(A_cl) - 1 < total_order:
-        curr_pole = far_pole_base * (1.0 + idx * 0.15) 
-        A_cl = PolynomialUtils.multiply(A_cl, [curr_pole, 1.0])
-        idx += 1
-        
-    # --- 4. Sylvester 矩阵求解 ---
-    num_vars = (deg_ctrl + 1) * 2
-    M = np.zeros((num_vars, num_vars))
-    b_vec = np.zeros(num_vars)
-    
-    for i in range(min(len(A_cl), num_vars)): b_vec[i] = A_cl[i]
-    
-    for j in range(deg_ctrl + 1):
-        for k in range(len(Dp_ext)):
-            if j+k < num_vars: M[j+k, j] = Dp_ext[k]
-            
-    off = deg_ctrl + 1
-    for j in range(deg_ctrl + 1):
-        for k in range(len(num)):
-            if j+k < num_vars: M[j+k, off+j] = num[k]
-            
-    try:
-        x = np.linalg.solve(M, b_vec)
-    except np.linalg.LinAlgError:
-        raise ValueError("设计失败：Sylvester矩阵奇异。\n原因可能是：\n1. 被控对象存在零极点对消\n2. 系统不可控或不可观")
-
-    A_prime = x[:deg_ctrl+1].tolist()
-    B_final = x[deg_ctrl+1:].tolist()
-    A_final = PolynomialUtils.multiply(A_prime, s_term)
-    
-    # 修改点：返回 A_cl 供验证
-    return B_final, A_final, r_add, zeta, wn, A_cl
\ No newline at end of file
+    n_far = max(0, total_order - len(poles))
+    poles += [-far_pole_base * (1.0 + idx * far_spacing) for idx in range(n_far)]
+    return poles
+
+def characteristic_coeffs(poles):
+    """实系数特征多项式 (升幂)：共轭对按二次因子相乘，全程实数运算"""
+    c = np.ones(1)
+    for p in poles:
+        if isinstance(p, complex):
+            if p.imag > 0: c = np.convolve(c, [p.real**2 + p.imag**2, -2.0 * p.real, 1.0])
+        else:
+            c = np.convolve(c, [-p, 1.0])
+    return c
+
+class ControllerDesigner:
+    """
+    单个被控对象的 Diophantine 设计器
+    Sylvester 矩阵只依赖扩展对象 (Dp_ext, num, r_add)，只构建一次；
+    单组指标直接 LAPACK 求解，多组指标首次批量求解时做一次 LU 分解，之后只需对右端项回代
+    """
+    def __init__(self, num, den, input_type='step'):
+        self.num = [float(c) for c in num]
+        self.den = [float(c) for c in den]
+        self.input_type = input_type
+
+        # --- 积分器增强 ---
+        req_type = 2 if input_type == 'ramp' else 1
+        cur_type = count_integrators(self.den)
+        self.r_add = max(0, req_type - cur_type)
+
+        # 乘 s^r_add 即系数整体右移
+        self.Dp_ext = [0.0] * self.r_add + [0.0 if abs(c) < 1e-9 else c for c in self.den]
+
+        n_ext = len(self.Dp_ext) - 1
+        self.deg_ctrl = n_ext - 1
+        self.total_order = n_ext + self.deg_ctrl
+        self.num_vars = (self.deg_ctrl + 1) * 2
+
+        # --- Sylvester 矩阵，LU 分解延迟到首次批量求解 ---
+        with profiler.stage("design.sylvester"):
+            self.M = self._sylvester()
+        self._lu = None
+
+    @property
+    def lu(self):
+        """Sylvester 矩阵的 LU 分解 (首次访问时计算)；奇异时抛出 ValueError"""
+        if self._lu is None:
+            try:
+                self._lu = MatrixUtils.lu_factor(self.M)
+            except np.linalg.LinAlgError:
+                raise ValueError(SINGULAR_MSG)
+        return self._lu
+
+    def _sylvester(self):
+        nv, dc = self.num_vars, self.deg_ctrl
+        M = np.zeros((nv, nv))
+        # 每列是多项式系数下移 j 行 (整列切片赋值，小矩阵时比花式索引快)
+        for off, poly in ((0, self.Dp_ext), (dc + 1, self.num)):
+            p = np.asarray(poly, dtype=float)
+            for j in range(dc + 1):
+                k = min(len(p), nv - j)
+                M[j:j+k, off+j] = p[:k]
+        return M
+
+    @profiler.profiled("design.solve")
+    def design(self, mp, ts):
+        """
+        单组指标 (快速路径)：单右端项直接对 Sylvester 矩阵调用 LAPACK 求解，不走逐行回代
+        返回: B_final, A_final, r_add, zeta, wn, A_cl (与 design_controller 一致)
+        """
+        zeta, wn, pole = desired_poles(mp, ts)
+        C = characteristic_coeffs(desired_closed_loop_poles(zeta, wn, pole, self.total_order))
+        C[np.abs(C) < 1e-9] = 0.0
+        m = min(len(C), self.num_vars)
+        b_vec = np.zeros(self.num_vars)
+        b_vec[:m] = C[:m]
+        try:
+            x = np.linalg.solve(self.M, b_vec)
+        except np.linalg.LinAlgError:
+            raise ValueError(SINGULAR_MSG)
+        return self._result(x, zeta, wn, C.tolist())
+
+    def _result(self, x, zeta, wn, A_cl):
+        """解向量拆分为 A'、B；A' 乘 s^r_add 即系数整体右移"""
+        dc = self.deg_ctrl
+        A_final = [0.0] * self.r_add + [0.0 if abs(c) < 1e-9 else c for c in x[:dc+1].tolist()]
+        return x[dc+1:].tolist(), A_final, self.r_add, zeta, wn, A_cl
+
+    def controllers_for(self, char_coeffs):
+        """
+        给定一批期望特征多项式 (K, total_order+1) 升幂系数，回代求解控制器
+        返回: A_final (K, deg_ctrl+1+r_add), B_final (K, deg_ctrl+1)
+        """
+        nv, dc = self.num_vars, self.deg_ctrl
+        C = np.atleast_2d(np.asarray(char_coeffs, dtype=float))
+        m = min(C.shape[1], nv)
+        b_mat = np.zeros((nv, len(C)))
+        b_mat[:m] = C[:, :m].T
+        X = MatrixUtils.lu_solve(self.lu, b_mat).T
+        A_prime, B_final = X[:, :dc+1], X[:, dc+1:]
+        A_final = np.zeros((len(C), dc + 1 + self.r_add))
+        A_final[:, self.r_add:] = A_prime  # 乘 s^r_add 即系数整体右移
+        return A_final, B_final
+
+    @profiler.profiled("design.solve")
+    def design_many(self, specs):
+        """批量设计：specs 为 [(mp, ts), ...]，所有右端项一次回代求解"""
+        nv = self.num_vars
+        targets = [desired_poles(mp, ts) for mp, ts in specs]
+
+        # 期望特征多项式：按极点个数分组后批量由根展开
+        groups = {}
+        for col, (zeta, wn, pole) in enumerate(targets):
+            poles = desired_closed_loop_poles(zeta, wn, pole, self.total_order)
+            groups.setdefault(len(poles), []).append((col, poles))
+        A_cls = [None] * len(specs)
+        b_mat = np.zeros((nv, len(specs)))
+        for members in groups.values():
+            C = Polynomial.coeffs_from_roots([p for _, p in members])
+            C[np.abs(C) < 1e-9] = 0.0
+            m = min(C.shape[1], nv)
+            for i, (col, _) in enumerate(members):
+                A_cls[col] = C[i].tolist()
+                b_mat[:m, col] = C[i, :m]
+
+        X = MatrixUtils.lu_solve(self.lu, b_mat)
+
+        return [self._result(X[:, col], zeta, wn, A_cls[col]) for col, (zeta, wn, _) in enumerate(targets)]
+
+@lru_cache(maxsize=64)
+def _designer_for(num, den, input_type):
+    return ControllerDesigner(num, den, input_type)
+
+def get_designer(num, den, input_type='step'):
+    """按被控对象缓存的设计器 (同一对象多次设计只做一次 Sylvester 分解)"""
+    return _designer_for(tuple(float(c) for c in num), tuple(float(c) for c in den), input_type)
+
+def design_controller(num, den, mp, ts, input_type='step'):
+    """
+    Diophantine 方程求解器 (含数值保护)
+    返回: B_final, A_final, r_add, zeta, wn, A_cl (期望特征多项式)
+    """
+    return get_designer(num, den, input_type).design(mp, ts)
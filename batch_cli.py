@@ -0,0 +1,130 @@
+"""
+无界面批处理：从 JSON Lines 读取设计任务，逐条输出结果 (JSON Lines)
+每行任务: {"num": [...], "den": [...], "mp": 10, "ts": 2, "input_type": "step", "ulim": 1000, "id": 可选}
+每个任务执行 设计 → 劳斯校验 → 仿真 → 指标，完成一条输出一条 (按完成顺序，以 index/id 对应输入)
+任务边读边提交，在途任务数有上限，内存占用与输入规模无关
+
+用法示例:
+    python batch_cli.py jobs.jsonl -o results.jsonl --workers 4
+    cat jobs.jsonl | python batch_cli.py > results.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+
+from pipeline import evaluate_design
+from result_cache import get_cache
+
+# 任务字段及缺省值
+JOB_DEFAULTS = {"input_type": "step", "ulim": 1000.0}
+REQUIRED_FIELDS = ("num", "den", "mp", "ts")
+
+def parse_job(line):
+    """解析一行任务；格式错误抛出 ValueError"""
+    try:
+        job = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON 格式错误: {e}")
+    if not isinstance(job, dict): raise ValueError("任务必须是 JSON 对象")
+    missing = [k for k in REQUIRED_FIELDS if k not in job]
+    if missing: raise ValueError(f"缺少字段: {', '.join(missing)}")
+    return dict(JOB_DEFAULTS, **job)
+
+def run_job(index, job, method='zoh', early_stop=False, traces=False, cache_dir=None):
+    """执行单个任务，返回结果 dict (失败时 status='error'，不抛出异常)"""
+    out = {"index": index, "id": job.get("id")}
+    try:
+        res = evaluate_design([float(c) for c in job["num"]], [float(c) for c in job["den"]],
+                              float(job["mp"]), float(job["ts"]), job["input_type"], float(job["ulim"]),
+                              method=method, early_stop=early_stop, cache=get_cache(cache_dir))
+    except Exception as e:
+        out.update(status="error", message=str(e).replace("\n", " "))
+        return out
+    out.update(
+        status="ok", Bc=res["Bc"], Ac=res["Ac"], r_added=res["r_added"], zeta=res["zeta"], wn=res["wn"],
+        stable=bool(res["stable"]), dt=res["dt"], t_end=res["t_end"],
+        stopped_early=res["stopped_early"], t_stop=res["t_stop"], metrics=res["metrics"],
+    )
+    if traces:
+        out.update(t=res["t"].tolist(), y=res["y"].tolist(), u=res["u"].tolist())
+    return out
+
+def _run_job(args):
+    return run_job(*args)
+
+def iter_jobs(lines):
+    """逐行产出 (index, job 或 ValueError)；空行跳过"""
+    for index, line in enumerate(lines):
+        if not line.strip(): continue
+        try:
+            yield index, parse_job(line)
+        except ValueError as e:
+            yield index, e
+
+def process(lines, workers=None, max_pending=None, **opts):
+    """
+    流式处理任务：按完成顺序逐条产出结果
+    workers: 进程数 (1 表示在当前进程内顺序执行)；max_pending: 在途任务上限 (缺省为 workers 的 4 倍)
+    opts: 透传给 run_job (method, early_stop, traces, cache_dir)
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    extra = (opts.get("method", 'zoh'), opts.get("early_stop", False),
+             opts.get("traces", False), opts.get("cache_dir"))
+
+    def error_row(index, e):
+        return {"index": index, "id": None, "status": "error", "message": str(e)}
+
+    if workers == 1:
+        for index, job in iter_jobs(lines):
+            yield error_row(index, job) if isinstance(job, ValueError) else run_job(index, job, *extra)
+        return
+
+    # 进程池模块只在并行时导入 (单进程调用保持快速启动)
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for index, job in iter_jobs(lines):
+            if isinstance(job, ValueError):
+                yield error_row(index, job)
+                continue
+            # 在途任务达到上限时先等待并输出已完成的结果 (背压)
+            while len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done: yield fut.result()
+            pending.add(pool.submit(_run_job, (index, job) + extra))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done: yield fut.result()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SISO 控制器设计批处理 (JSON Lines 输入/输出)")
+    parser.add_argument("input", nargs="?", default="-", help="任务文件 (缺省或 - 表示标准输入)")
+    parser.add_argument("-o", "--output", default="-", help="结果文件 (缺省或 - 表示标准输出)")
+    parser.add_argument("--workers", type=int, default=None, help="进程数 (默认 CPU 核数)")
+    parser.add_argument("--max-pending", type=int, default=None, help="在途任务上限 (默认 4×进程数)")
+    parser.add_argument("--method", default="zoh", choices=["zoh", "rk4", "rk45", "analytic", "switched"], help="仿真方法")
+    parser.add_argument("--early-stop", action="store_true", help="阶跃响应稳定后提前结束仿真")
+    parser.add_argument("--traces", action="store_true", help="结果中包含 t/y/u 轨迹")
+    parser.add_argument("--cache-dir", default=None, help="结果缓存目录")
+    args = parser.parse_args(argv)
+
+    fin = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    fout = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    n_ok = n_err = 0
+    try:
+        for row in process(fin, args.workers, args.max_pending, method=args.method,
+                           early_stop=args.early_stop, traces=args.traces, cache_dir=args.cache_dir):
+            fout.write(json.dumps(row, ensure_ascii=False, default=float) + "\n")
+            fout.flush()
+            if row["status"] == "ok": n_ok += 1
+            else: n_err += 1
+    finally:
+        if fin is not sys.stdin: fin.close()
+        if fout is not sys.stdout: fout.close()
+    print(f"完成 {n_ok + n_err} 个任务：成功 {n_ok}，失败 {n_err}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
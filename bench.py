@@ -0,0 +1,268 @@
+"""
+热点路径基准测试 (无界面)：控制器设计、单步仿真、闭环仿真、劳斯判据、多项式乘法、性能指标、启动耗时
+结果 (吞吐量 + 峰值内存) 写入 JSON；给定基线文件时逐项对比，超出容差的退化项以非零退出码报告
+
+用法示例:
+    python bench.py --out bench.json                       # 完整规模
+    python bench.py --quick --out bench.json               # 快速冒烟
+    python bench.py --quick --baseline bench_base.json     # 与基线对比
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+from math_core import Polynomial, PolynomialUtils, RouthStability
+from algorithms import design_controller, _designer_for
+from simulator import CustomSimulator, ClosedLoopSimulator, BatchClosedLoopSimulator, PerformanceAnalyzer
+from pipeline import normalize_controller
+
+# 规模配置：完整 / 快速
+PROFILES = {
+    "full": {
+        "orders": [1, 2, 4, 8, 16, 30],
+        "horizons": [1_000, 10_000, 100_000, 1_000_000],
+        "batches": [1, 16, 256, 4096],
+    },
+    "quick": {
+        "orders": [1, 4, 16, 30],
+        "horizons": [1_000, 10_000],
+        "batches": [1, 64],
+    },
+}
+# 每项最少计时时长 (s) 与最多重复次数；取最快一次
+MIN_TIME = 0.2
+MAX_REPEAT = 20
+
+def stable_plant(order, seed=0):
+    """order 阶稳定对象：实极点分布在 [-1, -4]，分子为常数 (升幂系数)"""
+    rng = np.random.default_rng(seed + order)
+    poles = -rng.uniform(1.0, 4.0, order)
+    den = Polynomial.from_roots(poles).tolist()
+    return [float(den[0])], den
+
+def _time(fn):
+    """重复执行 fn 直到累计 MIN_TIME，返回最快单次耗时 (s)"""
+    best, total, n = float("inf"), 0.0, 0
+    while n < MAX_REPEAT and (total < MIN_TIME or n < 2):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best, total, n = min(best, dt), total + dt, n + 1
+        if dt > MIN_TIME * 5: break  # 长用例只跑一次
+    return best
+
+def _peak_kb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024.0
+    finally:
+        tracemalloc.stop()
+
+def measure(name, params, n_ops, fn, memory=True):
+    """计时与峰值内存分开测量 (tracemalloc 会拖慢计时)"""
+    sec = _time(fn)
+    return {
+        "name": name, "params": params, "n_ops": n_ops,
+        "seconds": sec, "ops_per_s": n_ops / sec if sec > 0 else float("inf"),
+        "peak_kb": _peak_kb(fn) if memory else None,
+    }
+
+# --- 各热点路径 ---
+
+def bench_design(cfg, memory):
+    for order in cfg["orders"]:
+        num, den = stable_plant(order)
+        def fn():
+            _designer_for.cache_clear()  # 计入 Sylvester 构建与分解
+            design_controller(num, den, 10.0, 2.0)
+        yield measure("design_controller", {"order": order}, 1, fn, memory)
+
+def bench_update_state(cfg, memory):
+    for method in ("zoh", "rk4"):
+        for order in cfg["orders"]:
+            for steps in cfg["horizons"]:
+                num, den = stable_plant(order)
+                sim = CustomSimulator(num, den, method)
+                def fn():
+                    sim.reset()
+                    for _ in range(steps): sim.update_state(1.0, 1e-3)
+                yield measure("CustomSimulator.update_state", {"method": method, "order": order, "steps": steps},
+                              steps, fn, memory)
+
+def _closed_loop(order):
+    num, den = stable_plant(order)
+    Bc, Ac = normalize_controller(*design_controller(num, den, 10.0, 2.0)[:2])
+    return num, den, Bc, Ac
+
+def bench_closed_loop(cfg, memory):
+    for order in cfg["orders"]:
+        num, den, Bc, Ac = _closed_loop(order)
+        for steps in cfg["horizons"]:
+            eng = ClosedLoopSimulator(num, den, Bc, Ac, 1000.0, method='zoh')
+            dt = 1e-3
+            yield measure("ClosedLoopSimulator.run", {"order": order, "steps": steps},
+                          steps, lambda: eng.run(dt, steps * dt - dt / 2), memory)
+            yield measure("ClosedLoopSimulator.run_switched", {"order": order, "steps": steps},
+                          steps, lambda: eng.run_switched(dt, steps * dt - dt / 2), memory)
+
+def bench_batch_closed_loop(cfg, memory):
+    steps = cfg["horizons"][0]
+    for order in (2, 4):
+        num, den, Bc, Ac = _closed_loop(order)
+        for n in cfg["batches"]:
+            eng = BatchClosedLoopSimulator([num] * n, [den] * n, [Bc] * n, [Ac] * n, 1000.0)
+            dt = 1e-3
+            yield measure("BatchClosedLoopSimulator.run", {"order": order, "batch": n, "steps": steps},
+                          n * steps, lambda: eng.run(dt, steps * dt - dt / 2), memory)
+
+def bench_routh(cfg, memory):
+    for order in cfg["orders"]:
+        _, den = stable_plant(order)
+        yield measure("RouthStability.check", {"order": order}, 1, lambda: RouthStability.check(den), memory)
+        for n in cfg["batches"]:
+            C = np.tile(den, (n, 1))
+            yield measure("RouthStability.check_batch", {"order": order, "batch": n},
+                          n, lambda: RouthStability.check_batch(C), memory)
+
+def bench_multiply(cfg, memory):
+    rng = np.random.default_rng(0)
+    for deg in sorted(set(cfg["orders"] + [100, 1000])):
+        a = rng.standard_normal(deg + 1).tolist()
+        b = rng.standard_normal(deg + 1).tolist()
+        yield measure("PolynomialUtils.multiply", {"degree": deg}, 1,
+                      lambda: PolynomialUtils.multiply(a, b), memory)
+
+def bench_metrics(cfg, memory):
+    for steps in cfg["horizons"]:
+        t = np.linspace(0.0, 10.0, steps)
+        y = 1.0 - np.exp(-t) * np.cos(3.0 * t)
+        yield measure("PerformanceAnalyzer.get_metrics", {"steps": steps}, steps,
+                      lambda: PerformanceAnalyzer(t, y, 1.0).get_metrics(), memory)
+    steps = cfg["horizons"][0]
+    t = np.linspace(0.0, 10.0, steps)
+    for n in cfg["batches"]:
+        w = np.linspace(1.0, 5.0, n)[:, None]
+        Y = 1.0 - np.exp(-t) * np.cos(w * t)
+        yield measure("PerformanceAnalyzer.batch_metrics", {"batch": n, "steps": steps}, n * steps,
+                      lambda: PerformanceAnalyzer.batch_metrics(t, Y, 1.0), memory)
+
+# 启动耗时：在新解释器中执行的代码片段 (python / numpy 为下限参照)
+STARTUP_CASES = {
+    "python": "pass",
+    "numpy": "import numpy",
+    "pipeline": "import pipeline",
+    "batch_cli": "import batch_cli",
+    "main_gui.import": "import main_gui",
+    # 完整启动：窗口运行事件循环 0.5 s (长于滑块预览的节流间隔，启动时误触发的预览会被计入) 后退出
+    # 绘图区首次设计时才创建；需要显示环境，否则跳过
+    "main_gui.launch": "import main_gui; app = main_gui.launch(); app.root.after(500, app.root.quit); "
+                       "app.root.mainloop(); app.root.destroy()",
+}
+# 无界面入口不应加载的界面 / 绘图依赖
+GUI_MODULES = ("tkinter", "ttkbootstrap", "matplotlib")
+# 各启动项禁止加载的模块 (出现即判定失败，保证延迟导入不被破坏)
+STARTUP_FORBIDDEN = {
+    "pipeline": GUI_MODULES, "batch_cli": GUI_MODULES, "main_gui.import": GUI_MODULES,
+    "main_gui.launch": ("matplotlib",),
+}
+
+def _python(code):
+    return subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+def bench_startup(cfg, memory):
+    for name, code in STARTUP_CASES.items():
+        # 先执行一次：确认可运行 (如有无显示环境) 并记录加载的界面依赖
+        probe = _python(code + f"\nimport sys; print(','.join(m for m in {GUI_MODULES!r} if m in sys.modules))")
+        if probe.returncode != 0: continue
+        rec = measure("startup", {"target": name}, 1, lambda: _python(code), memory=False)
+        rec["gui_modules"] = [m for m in probe.stdout.strip().split(",") if m]
+        rec["forbidden_modules"] = [m for m in rec["gui_modules"] if m in STARTUP_FORBIDDEN.get(name, ())]
+        yield rec
+
+SUITES = {
+    "design": bench_design,
+    "update_state": bench_update_state,
+    "closed_loop": bench_closed_loop,
+    "batch": bench_batch_closed_loop,
+    "routh": bench_routh,
+    "multiply": bench_multiply,
+    "metrics": bench_metrics,
+    "startup": bench_startup,
+}
+
+def run_benchmarks(profile="full", suites=None, memory=True, log=print):
+    cfg = PROFILES[profile]
+    results = []
+    for name in suites or SUITES:
+        for rec in SUITES[name](cfg, memory):
+            results.append(rec)
+            if log: log(f"{rec['name']:<34} {json.dumps(rec['params']):<48} {rec['ops_per_s']:>14.4g} ops/s")
+    return {
+        "meta": {
+            "profile": profile,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0], "numpy": np.__version__,
+            "platform": platform.platform(), "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+def _case_key(rec):
+    return rec["name"], json.dumps(rec["params"], sort_keys=True)
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    逐项对比吞吐量：ratio = 当前 / 基线 (ops/s)
+    返回: (对比行列表, 退化项列表)，ratio < 1 - tolerance 视为退化
+    """
+    base = {_case_key(r): r for r in baseline["results"]}
+    rows, regressions = [], []
+    for rec in current["results"]:
+        ref = base.get(_case_key(rec))
+        if ref is None: continue
+        ratio = rec["ops_per_s"] / ref["ops_per_s"] if ref["ops_per_s"] else float("inf")
+        row = {"name": rec["name"], "params": rec["params"], "ratio": ratio}
+        rows.append(row)
+        if ratio < 1.0 - tolerance: regressions.append(row)
+    return rows, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SISO 设计平台热点路径基准测试")
+    parser.add_argument("--quick", action="store_true", help="使用快速规模")
+    parser.add_argument("--suite", nargs="+", choices=list(SUITES), help="只运行指定项目")
+    parser.add_argument("--out", default="bench.json", help="结果 JSON 路径")
+    parser.add_argument("--baseline", default=None, help="基线 JSON 路径 (给定时逐项对比)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的吞吐量下降比例")
+    parser.add_argument("--no-memory", action="store_true", help="不测量峰值内存")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks("quick" if args.quick else "full", args.suite, not args.no_memory)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, ensure_ascii=False)
+    print(f"共 {len(report['results'])} 项 -> {args.out}")
+
+    eager = [r for r in report["results"] if r.get("forbidden_modules")]
+    for r in eager:
+        print(f"{r['params']['target']} 启动时加载了不应加载的模块: {', '.join(r['forbidden_modules'])}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows, regressions = compare(report, baseline, args.tolerance)
+        for r in rows:
+            flag = "  <-- 退化" if r in regressions else ""
+            print(f"{r['name']:<34} {json.dumps(r['params']):<48} x{r['ratio']:.2f}{flag}")
+        print(f"对比 {len(rows)} 项，退化 {len(regressions)} 项 (容差 {args.tolerance:.0%})")
+        return 1 if regressions or eager else 0
+    return 1 if eager else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
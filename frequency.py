@@ -0,0 +1,157 @@
+"""
+频域分析：开环 L(s) = Gc(s)·Gp(s) 的 Bode / Nyquist、幅值/相位裕度、闭环带宽
+多项式均为升幂系数；整段频率网格一次 Horner 向量化求值，穿越点在网格括号内二分细化
+"""
+import numpy as np
+from math_core import Polynomial, PolynomialUtils
+
+# 穿越点二分细化次数 (log10 ω 上，约 1e-15 量级相对精度)
+REFINE_ITERS = 50
+
+class FrequencyAnalyzer:
+    """
+    单位负反馈回路的频域分析
+    num, den: 被控对象 Gp(s)；ctrl_num, ctrl_den: 控制器 Gc(s) (缺省为 1，即只分析对象)
+    """
+    def __init__(self, num, den, ctrl_num=(1.0,), ctrl_den=(1.0,)):
+        # 分子分母各自保留因子，分别求值后相乘，避免展开高阶乘积带来的系数误差
+        self._nums = [Polynomial(num).c, Polynomial(ctrl_num).c]
+        self._dens = [Polynomial(den).c, Polynomial(ctrl_den).c]
+        if not np.any(self._dens[0]) or not np.any(self._dens[1]):
+            raise ValueError("分母多项式不能为零")
+        self.num = PolynomialUtils.multiply(list(num), list(ctrl_num))
+        self.den = PolynomialUtils.multiply(list(den), list(ctrl_den))
+
+    def response(self, w):
+        """开环频率响应 L(jω)，ω 可为任意形状的数组"""
+        s = 1j * np.asarray(w, dtype=float)
+        N = Polynomial.horner(self._nums[0], s) * Polynomial.horner(self._nums[1], s)
+        D = Polynomial.horner(self._dens[0], s) * Polynomial.horner(self._dens[1], s)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return N / D
+
+    def closed_loop(self, w):
+        """闭环 T(jω) = L / (1 + L)"""
+        L = self.response(w)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return L / (1.0 + L)
+
+    def default_grid(self, n=2000):
+        """按开环零极点幅值自动确定的对数频率网格 (最小幅值/100 ~ 最大幅值×100)"""
+        mags = np.abs(np.concatenate([Polynomial(self.num).trim().roots(),
+                                      Polynomial(self.den).trim().roots()]))
+        mags = mags[mags > 1e-9]
+        lo, hi = (mags.min(), mags.max()) if len(mags) else (1.0, 1.0)
+        return np.logspace(np.floor(np.log10(lo)) - 2, np.ceil(np.log10(hi)) + 2, n)
+
+    def bode(self, w=None, adaptive=True, n_refine=20):
+        """
+        返回: w, 幅值 (dB), 相位 (度，已展开)
+        adaptive: 在每个增益/相位穿越点附近加密 n_refine 个对数均匀点
+        """
+        w = self.default_grid() if w is None else np.asarray(w, dtype=float)
+        if adaptive:
+            extra = [np.logspace(np.log10(a), np.log10(b), n_refine)
+                     for a, b in self._brackets(w, self.response(w))]
+            if extra: w = np.unique(np.concatenate([w] + extra))
+        L = self.response(w)
+        mag_db = 20.0 * np.log10(np.abs(L))
+        phase = np.degrees(np.unwrap(np.angle(L)))
+        return w, mag_db, phase
+
+    def nyquist(self, w=None):
+        """返回: w, L(jω) (复数数组)"""
+        w = self.default_grid() if w is None else np.asarray(w, dtype=float)
+        return w, self.response(w)
+
+    # --- 穿越点 ---
+
+    @staticmethod
+    def _sign_changes(f):
+        f = np.asarray(f)
+        return np.flatnonzero(np.signbit(f[:-1]) != np.signbit(f[1:]))
+
+    def _brackets(self, w, L):
+        """增益穿越 (|L| = 1) 与相位穿越 (Im L = 0 且 Re L < 0) 所在的网格区间"""
+        idx = np.concatenate([self._gain_idx(L), self._phase_idx(L)])
+        return [(w[i], w[i + 1]) for i in np.unique(idx)]
+
+    @staticmethod
+    def _gain_idx(L):
+        with np.errstate(divide='ignore'):
+            return FrequencyAnalyzer._sign_changes(np.log(np.abs(L)))
+
+    @staticmethod
+    def _phase_idx(L):
+        idx = FrequencyAnalyzer._sign_changes(L.imag)
+        # 只保留负实轴上的穿越 (两端点实部均为负)
+        return idx[(L.real[idx] < 0) & (L.real[idx + 1] < 0)]
+
+    @staticmethod
+    def _bisect(f, a, b):
+        """对一组括号区间同时二分 (在 log10 ω 上)：f 为 ω 数组 → 值数组"""
+        la, lb = np.log10(a), np.log10(b)
+        fa = f(a)
+        for _ in range(REFINE_ITERS):
+            lm = 0.5 * (la + lb)
+            fm = f(10.0 ** lm)
+            left = np.signbit(fm) == np.signbit(fa)
+            la = np.where(left, lm, la)
+            fa = np.where(left, fm, fa)
+            lb = np.where(left, lb, lm)
+        return 10.0 ** (0.5 * (la + lb))
+
+    def gain_crossovers(self, w=None):
+        """所有增益穿越频率 (|L(jω)| = 1)"""
+        w = self.default_grid() if w is None else np.asarray(w, dtype=float)
+        i = self._gain_idx(self.response(w))
+        return self._bisect(lambda x: np.log(np.abs(self.response(x))), w[i], w[i + 1])
+
+    def phase_crossovers(self, w=None):
+        """所有相位穿越频率 (L(jω) 穿过负实轴)"""
+        w = self.default_grid() if w is None else np.asarray(w, dtype=float)
+        i = self._phase_idx(self.response(w))
+        return self._bisect(lambda x: self.response(x).imag, w[i], w[i + 1])
+
+    def bandwidth(self, w=None):
+        """闭环带宽：|T(jω)| 首次降到 |T(0)|/√2 的频率；始终不低于该值时返回 inf"""
+        w = self.default_grid() if w is None else np.asarray(w, dtype=float)
+        N0 = self._nums[0][0] * self._nums[1][0]
+        D0 = self._dens[0][0] * self._dens[1][0]
+        # 直流增益 T(0) = N0 / (D0 + N0)；开环含积分器 (D0 = 0) 时为 1
+        if abs(D0 + N0) < 1e-12: return np.inf
+        thr = abs(N0 / (D0 + N0)) / np.sqrt(2.0)
+        f = lambda x: np.abs(self.closed_loop(x)) - thr
+        below = np.flatnonzero(f(w) < 0)
+        if not len(below): return np.inf
+        i = below[0]
+        if i == 0: return float(w[0])
+        return float(self._bisect(f, w[i-1:i], w[i:i+1])[0])
+
+    def margins(self, w=None):
+        """
+        稳定裕度 (取各穿越点中最不利者)
+        返回: {gm (倍数), gm_db, w_pc (相位穿越频率), pm (度), w_gc (增益穿越频率), bandwidth}
+        无相位穿越时 gm = inf；无增益穿越时 pm = inf
+        """
+        w = self.default_grid() if w is None else np.asarray(w, dtype=float)
+        w_pc = self.phase_crossovers(w)
+        w_gc = self.gain_crossovers(w)
+
+        gm, gm_db, wpc = np.inf, np.inf, np.nan
+        if len(w_pc):
+            mags = np.abs(self.response(w_pc))
+            k = int(np.argmax(mags))
+            gm, wpc = 1.0 / mags[k], w_pc[k]
+            gm_db = -20.0 * np.log10(mags[k])
+
+        pm, wgc = np.inf, np.nan
+        if len(w_gc):
+            # 相位裕度 = 180° + ∠L，折算到 (-180°, 180°]
+            pms = np.degrees(np.angle(self.response(w_gc))) + 180.0
+            pms = np.where(pms > 180.0, pms - 360.0, pms)
+            k = int(np.argmin(pms))
+            pm, wgc = pms[k], w_gc[k]
+
+        return {"gm": float(gm), "gm_db": float(gm_db), "w_pc": float(wpc),
+                "pm": float(pm), "w_gc": float(wgc), "bandwidth": self.bandwidth(w)}
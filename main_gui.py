@@ -1,24 +1,53 @@
-import tkinter as tk
-from tkinter import messagebox, scrolledtext
-import ttkbootstrap as ttk
-from ttkbootstrap.constants import *
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.figure import Figure
+import os
+import queue
+import tempfile
+import threading
+import time
 import numpy as np
-import matplotlib.pyplot as plt
 
-# 引入核心模块
+# 引入核心模块 (仅依赖 NumPy)
 from math_core import PolynomialUtils, RouthStability
 from algorithms import design_controller
-from simulator import CustomSimulator, PerformanceAnalyzer
-
-# 绘图字体设置
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'SimSun', 'Arial'] 
-plt.rcParams['axes.unicode_minus'] = False
-plt.rcParams['font.family'] = 'sans-serif'
+from simulator import ClosedLoopSimulator, PerformanceAnalyzer
+from pipeline import (validate_specs, normalize_controller, closed_loop_poly, select_time_step,
+                      DesignSession, add_actuator_metrics, design_cache_key, diophantine_table)
+from result_cache import ResultCache
+from run_archive import save_run, list_runs, run_filename, find_run, prune_runs
+from frequency import FrequencyAnalyzer
+from root_locus import RootLocus, far_pole_locus
+import profiler
+from plotting import DecimatedLine, DecimatedCollection, BlitManager
+
+# 界面与绘图依赖在首次使用时才导入 (见 _load_gui / _load_plotting)：
+# 无界面导入本模块不付出 Tk / matplotlib 的开销，绘图区在首次设计 / 预览 / 根轨迹时才创建
+tk = messagebox = scrolledtext = ttk = None
+Figure = FigureCanvasTkAgg = NavigationToolbar2Tk = Line2D = None
+
+def _load_gui():
+    """导入 Tk / ttkbootstrap，并把 ttkbootstrap.constants 的常量 (LEFT, BOTH, ...) 放入模块命名空间"""
+    global tk, messagebox, scrolledtext, ttk
+    if ttk is not None: return
+    import tkinter as tk
+    from tkinter import messagebox, scrolledtext
+    import ttkbootstrap as ttk
+    from ttkbootstrap import constants
+    globals().update({k: getattr(constants, k) for k in constants.__all__})
+
+def _load_plotting():
+    """导入 matplotlib 的 Figure 与 Tk 后端 (不经过 pyplot)，并设置绘图字体"""
+    global Figure, FigureCanvasTkAgg, NavigationToolbar2Tk, Line2D
+    if Figure is not None: return
+    import matplotlib
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+    from matplotlib.lines import Line2D
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'SimSun', 'Arial']
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    matplotlib.rcParams['font.family'] = 'sans-serif'
 
 class AutoControlApp:
     def __init__(self, root):
+        _load_gui()
         self.root = root
         self.root.title("SISO 自动控制系统设计平台 Pro v5.1 (Performance Optimized)") 
         self.root.geometry("1300x900")
@@ -38,8 +67,24 @@ class AutoControlApp:
         self.right_panel = ttk.Frame(self.main_container)
         self.right_panel.pack(side=RIGHT, fill=BOTH, expand=YES, padx=5, pady=5)
         
+        # 后台计算线程及其消息队列 / 取消标志
+        self._worker = None
+        self._queue = None
+        self._cancel = None
+        self._trace_parts = []
+        # 滑块实时预览：节流任务、上次预览结束时刻、设计期间待补的预览，以及分阶段缓存
+        self._live_job = None
+        self._live_last = 0.0
+        self._live_pending = False
+        self.session = DesignSession(max_points=self.LIVE_POINTS)
+        # 设计 + 仿真结果缓存 (跨会话复用，与批量扫描使用相同的键)
+        self.result_cache = ResultCache(cache_dir=os.path.join(os.path.expanduser("~"), ".siso_design_cache"))
+        # 每次完成的设计归档到此目录，供历史对比
+        self.archive_dir = os.path.join(os.path.expanduser("~"), ".siso_runs")
+
         self.create_sidebar()
-        self.create_plot_area()
+        # 绘图区在首次需要时创建 (create_plot_area)
+        self.canvas = None
 
     def create_sidebar(self):
         title_frame = ttk.Frame(self.left_panel, padding=(5, 8))
@@ -57,6 +102,8 @@ class AutoControlApp:
         group_specs.pack(fill=X, pady=(0, 6))
         self.entry_mp = self.create_labeled_entry(group_specs, "超调量MP(%)", "10", "5-20%")
         self.entry_ts = self.create_labeled_entry(group_specs, "调节时间Ts(s)", "2", "系统稳态时间")
+        self.create_slider(group_specs, "MP", self.entry_mp, 0.5, 50.0)
+        self.create_slider(group_specs, "Ts", self.entry_ts, 0.1, 20.0)
 
         # 3. 仿真设置
         group_sim = ttk.Labelframe(self.left_panel, text="⚙️ 仿真设置", padding=8)
@@ -68,12 +115,24 @@ class AutoControlApp:
         ttk.Radiobutton(input_frame, text="阶跃响应", variable=self.var_input, value="step").pack(side=LEFT, padx=5)
         ttk.Radiobutton(input_frame, text="斜坡响应", variable=self.var_input, value="ramp").pack(side=LEFT, padx=5)
         self.entry_ulim = self.create_labeled_entry(group_sim, "控制量限幅", "1000", "执行器最大输出")
+        self.var_profile = tk.BooleanVar(master=self.left_panel, value=False)
+        ttk.Checkbutton(group_sim, text="性能剖析 (记录各阶段耗时)", variable=self.var_profile).pack(anchor=W, pady=(2, 0))
+        self.var_profile_alloc = tk.BooleanVar(master=self.left_panel, value=False)
+        ttk.Checkbutton(group_sim, text="统计各阶段内存净分配 (较慢)", variable=self.var_profile_alloc).pack(anchor=W)
+        self.create_slider(group_sim, "限幅", self.entry_ulim, 0.1, 1000.0, log=True)
 
         # 4. 按钮
         btn_frame = ttk.Frame(self.left_panel, padding=3)
         btn_frame.pack(fill=X, pady=(0, 6))
         self.btn_run = ttk.Button(btn_frame, text="🚀 开始设计", command=self.run_design, bootstyle="success")
-        self.btn_run.pack(fill=X, ipady=3)
+        self.btn_run.pack(side=LEFT, fill=X, expand=YES, ipady=3)
+        self.btn_cancel = ttk.Button(btn_frame, text="⏹ 取消", command=self.cancel_design,
+                                     bootstyle="secondary", state=DISABLED)
+        self.btn_cancel.pack(side=LEFT, padx=(4, 0), ipady=3)
+        self.btn_locus = ttk.Button(btn_frame, text="📍 根轨迹", command=self.show_root_locus, bootstyle="info")
+        self.btn_locus.pack(side=LEFT, padx=(4, 0), ipady=3)
+        self.btn_compare = ttk.Button(btn_frame, text="🗂 历史", command=self.show_run_compare, bootstyle="info")
+        self.btn_compare.pack(side=LEFT, padx=(4, 0), ipady=3)
 
         # 5. 参数显示
         result_frame = ttk.Labelframe(self.left_panel, text="📊 控制器参数", padding=5)
@@ -97,7 +156,130 @@ class AutoControlApp:
         if hint_text: ttk.Label(container, text=hint_text, font=("微软雅黑", 7), foreground="gray").pack(anchor=W)
         return entry
 
+    def create_slider(self, parent, label_text, entry, lo, hi, log=False):
+        """与输入框联动的滑块：拖动时写回输入框并触发 (节流) 实时预览；log=True 时按对数刻度"""
+        fwd = np.log10 if log else (lambda v: v)
+        inv = (lambda v: 10.0 ** v) if log else (lambda v: v)
+        container = ttk.Frame(parent)
+        container.pack(fill=X, pady=(0, 2))
+        ttk.Label(container, text=label_text, font=("微软雅黑", 8), foreground="gray", width=5).pack(side=LEFT)
+
+        def on_move(v):
+            val = inv(float(v))
+            entry.delete(0, tk.END)
+            entry.insert(0, f"{val:.4g}")
+            self.schedule_live_update()
+
+        # 先定位再挂回调：Scale.set() 会触发 command，初始化时不应改写输入框或触发预览
+        scale = ttk.Scale(container, from_=fwd(lo), to=fwd(hi))
+        try:
+            scale.set(fwd(min(max(float(entry.get()), lo), hi)))
+        except ValueError:
+            pass
+        scale.configure(command=on_move)
+        scale.pack(side=LEFT, fill=X, expand=YES)
+        return scale
+
+    # 滑块预览节流间隔 (ms)：拖动开始立即预览，拖动中每个间隔至多一次，停下后再补最后位置
+    LIVE_THROTTLE_MS = 40
+    # 实时预览的仿真点数上限 (完整精度请点击 "开始设计")
+    LIVE_POINTS = 5000
+
+    def schedule_live_update(self):
+        """节流调度 (首尾两端触发)：已有待执行的预览时不重复排队，执行时读取输入框的最新值"""
+        if self._live_job is not None: return
+        wait = self.LIVE_THROTTLE_MS - (time.perf_counter() - self._live_last) * 1000.0
+        self._live_job = self.root.after(max(0, int(wait)), self._run_live_update)
+
+    def _run_live_update(self):
+        # 节流间隔从本次预览结束算起，给界面事件留出处理时间
+        self._live_job = None
+        try:
+            self.live_update()
+        finally:
+            self._live_last = time.perf_counter()
+
+    def live_update(self):
+        """滑块实时预览：分阶段缓存，仅重算受影响的环节 (限幅变化不重新设计)"""
+        if self._worker is not None and self._worker.is_alive():
+            # 完整设计进行中：记下待预览，设计结束后 (_poll_queue) 补上最后的滑块位置
+            self._live_pending = True
+            return
+        self.create_plot_area()
+        try:
+            num = [float(x) for x in self.entry_num.get().replace(',',' ').split()]
+            den = [float(x) for x in self.entry_den.get().replace(',',' ').split()]
+            mp = float(self.entry_mp.get())
+            ts = float(self.entry_ts.get())
+            ulim = float(self.entry_ulim.get())
+            in_type = self.var_input.get()
+            res = self.session.update(num, den, mp, ts, ulim, in_type)
+        except Exception as e:
+            self.log(f"❌ 预览失败：{str(e)}", "error")
+            return
+        if not res["resimulated"]: return
+        if res["redesigned"]:
+            self.update_controller_info(res["Bc"], res["Ac"], res["r_added"], res["zeta"], res["wn"])
+        self.plot_results(res["t"], res["y"], res["u"], ulim, in_type, metrics=res["metrics"], verbose=False)
+
+    def show_root_locus(self):
+        """新窗口显示根轨迹：回路增益 K 的轨迹 (K=1 为当前设计) 与远极点倍数的参数轨迹"""
+        try:
+            num = [float(x) for x in self.entry_num.get().replace(',',' ').split()]
+            den = [float(x) for x in self.entry_den.get().replace(',',' ').split()]
+            mp = float(self.entry_mp.get())
+            ts = float(self.entry_ts.get())
+            in_type = self.var_input.get()
+            validate_specs(mp, ts, 1.0)
+            Bc, Ac = normalize_controller(*design_controller(num, den, mp, ts, in_type)[:2])
+            with profiler.stage("gui.root_locus"):
+                gains, R = RootLocus(num, den, Bc, Ac).compute()
+                ratios, Rf = far_pole_locus(num, den, mp, ts, in_type)
+        except Exception as e:
+            self.log(f"❌ 根轨迹失败：{str(e)}", "error")
+            return
+
+        self.create_plot_area()
+        win = tk.Toplevel(self.root)
+        win.title("根轨迹")
+        win.geometry("900x480")
+        fig = Figure(figsize=(9, 4.5), dpi=100, facecolor='#ffffff')
+        ax1 = fig.add_subplot(121)
+        ax2 = fig.add_subplot(122)
+        fig.subplots_adjust(wspace=0.3)
+
+        self.setup_plot_style("回路增益 K 根轨迹", ax1)
+        ax1.plot(R.real, R.imag, linewidth=1)
+        ax1.plot(R[0].real, R[0].imag, 'kx', markersize=6, label=f'K={gains[0]:.0e}')
+        k1 = int(np.argmin(np.abs(gains - 1.0)))
+        ax1.plot(R[k1].real, R[k1].imag, 'rs', markersize=5, label='设计点 K=1')
+        ax1.axvline(0, color='k', linewidth=0.8, alpha=0.5)
+        ax1.set_xlabel("Re")
+        ax1.set_ylabel("Im")
+        # 视野以设计点极点为准，避免高增益下远离的分支压缩主导区域
+        span = np.max(np.abs(R[k1][np.isfinite(R[k1])])) * 1.5 if np.any(np.isfinite(R[k1])) else 1.0
+        ax1.set_xlim(-span, span * 0.3)
+        ax1.set_ylim(-span, span)
+        ax1.legend(prop={'size': 8})
+
+        self.setup_plot_style("远极点倍数参数轨迹", ax2)
+        ax2.plot(Rf.real, Rf.imag, linewidth=1)
+        ax2.plot(Rf[0].real, Rf[0].imag, 'k.', label=f'倍数={ratios[0]:.1f}')
+        ax2.plot(Rf[-1].real, Rf[-1].imag, 'b^', markersize=4, label=f'倍数={ratios[-1]:.1f}')
+        ax2.axvline(0, color='k', linewidth=0.8, alpha=0.5)
+        ax2.set_xlabel("Re")
+        ax2.legend(prop={'size': 8})
+
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=BOTH, expand=YES)
+        toolbar = NavigationToolbar2Tk(canvas, win)
+        toolbar.update()
+
     def create_plot_area(self):
+        """绘图区 (首次调用时导入 matplotlib；已创建时直接返回)"""
+        if self.canvas is not None: return
+        _load_plotting()
         plot_container = ttk.Labelframe(self.right_panel, text="📈 系统响应与控制量", padding=10)
         plot_container.pack(fill=BOTH, expand=YES)
         
@@ -107,6 +289,8 @@ class AutoControlApp:
         self.fig.subplots_adjust(hspace=0.3) 
 
         self.canvas = FigureCanvasTkAgg(self.fig, master=plot_container)
+        # 数据曲线 blit 重绘 (仿真过程中的增量刷新)
+        self.blit = BlitManager(self.canvas)
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill=BOTH, expand=YES)
         
@@ -154,13 +338,16 @@ class AutoControlApp:
         )
         self.controller_info.config(text=info)
 
+    # 后台计算结果的轮询间隔 (ms)
+    POLL_MS = 50
+
     def run_design(self):
+        """读取输入后在后台线程执行 设计 → 仿真，界面通过队列逐步刷新"""
+        if self._worker is not None and self._worker.is_alive(): return
         self.txt_log.delete(1.0, tk.END)
-        self.btn_run.configure(state=DISABLED, text="⏳ 计算中...")
-        self.root.update()
-
+        self.create_plot_area()
         try:
-            # 1. 获取输入 (含防呆校验)
+            # 1. 获取输入 (含防呆校验)；Tk 控件只能在主线程读取
             try:
                 num = [float(x) for x in self.entry_num.get().replace(',',' ').split()]
                 den = [float(x) for x in self.entry_den.get().replace(',',' ').split()]
@@ -170,211 +357,380 @@ class AutoControlApp:
                 in_type = self.var_input.get()
             except ValueError:
                 raise ValueError("输入格式错误：请输入有效的数字，不要包含非数字字符。")
+            validate_specs(mp, ts, ulim)
+        except Exception as e:
+            self.log(f"❌ 错误：{str(e)}", "error")
+            return
 
-            if ts <= 1e-6: raise ValueError("调节时间 Ts 太小 (必须 > 1e-6s)")
-            if mp <= 0.01 or mp >= 100: raise ValueError("超调量 MP 必须在 0.01% - 100% 之间")
-            if ulim <= 0: raise ValueError("控制量限幅值必须为正数")
+        self.btn_run.configure(state=DISABLED, text="⏳ 计算中...")
+        self.btn_cancel.configure(state=NORMAL)
+        # 勾选内存统计时同时开启剖析
+        track_alloc = self.var_profile_alloc.get()
+        if self.var_profile.get() or track_alloc: profiler.enable(track_alloc=track_alloc)
+        self._queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._worker = threading.Thread(target=self._design_worker, daemon=True,
+                                        args=(num, den, mp, ts, ulim, in_type, self._queue, self._cancel))
+        self._worker.start()
+        self.root.after(self.POLL_MS, self._poll_queue)
+
+    def cancel_design(self):
+        if self._cancel is not None: self._cancel.set()
+        self.btn_cancel.configure(state=DISABLED)
+
+    def _design_worker(self, num, den, mp, ts, ulim, in_type, q, cancel):
+        """后台线程：不触碰任何 Tk 对象，所有界面更新以消息形式放入队列"""
+        def log(msg, level="info"): q.put(("log", msg, level))
+        try:
+            log(f"✅ 对象: {PolynomialUtils.to_str(num)} / {PolynomialUtils.to_str(den)}")
 
-            self.log(f"✅ 对象: {PolynomialUtils.to_str(num)} / {PolynomialUtils.to_str(den)}")
+            # 1. 相同对象/指标/限幅的结果直接取自缓存 (在设计前查找，命中时跳过设计、校验与仿真)
+            key = design_cache_key(num, den, mp, ts, in_type, ulim)
+            inputs = {"num": num, "den": den, "mp": mp, "ts": ts, "input_type": in_type, "ulim": ulim}
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                self._replay_cached(num, inputs, key, cached, q, log)
+                return
 
             # 2. 设计控制器
-            Bc, Ac, r_added, zeta, wn, desired_poly = design_controller(num, den, mp, ts, in_type)
-            
-            if abs(Ac[-1]) > 1e-9:
-                scale_factor = Ac[-1]
-                Ac = [c / scale_factor for c in Ac]
-                Bc = [c / scale_factor for c in Bc]
-            
-            self.update_controller_info(Bc, Ac, r_added, zeta, wn)
-            self.log(f"> 设计目标：ζ={zeta:.3f}, ωn={wn:.2f}", "success")
+            with profiler.stage("gui.design"):
+                Bc, Ac, r_added, zeta, wn, desired_poly = design_controller(num, den, mp, ts, in_type)
+                Bc, Ac = normalize_controller(Bc, Ac)
+            q.put(("controller", Bc, Ac, r_added, zeta, wn))
+            log(f"> 设计目标：ζ={zeta:.3f}, ωn={wn:.2f}", "success")
 
             # 3. 丢番图方程验证
-            self.log("-" * 55)
-            self.log("🔍 验证环节：丢番图方程求解 (LHS vs RHS)")
-            LHS_part1 = PolynomialUtils.multiply(den, Ac)
-            LHS_part2 = PolynomialUtils.multiply(num, Bc)
-            actual_poly = PolynomialUtils.add(LHS_part1, LHS_part2)
-            
-            len_max = max(len(actual_poly), len(desired_poly))
-            act_pad = [0.0]*(len_max - len(actual_poly)) + actual_poly
-            des_pad = [0.0]*(len_max - len(desired_poly)) + desired_poly
-            
+            log("-" * 55)
+            log("🔍 验证环节：丢番图方程求解 (LHS vs RHS)")
+            with profiler.stage("gui.verify"):
+                actual_poly = closed_loop_poly(num, den, Bc, Ac)
+
+            table = diophantine_table(actual_poly, desired_poly)
+
             header = f"{'阶次':<6} {'实际系数(LHS)':<15} {'期望系数(RHS)':<15} {'误差':<12}"
-            self.log(header)
-            self.log("-" * 55)
-            
-            for i in range(len_max - 1, -1, -1):
-                idx = len_max - 1 - i
-                val_act = act_pad[idx]
-                val_des = des_pad[idx]
-                err = abs(val_act - val_des)
-                if abs(val_act) > 1e-9 or abs(val_des) > 1e-9:
-                    row_str = f"s^{i:<5} {val_act:<15.5f} {val_des:<15.5f} {err:<12.1e}"
-                    self.log(row_str)
-            self.log("-" * 55)
+            log(header)
+            log("-" * 55)
+            for i, val_act, val_des, err in table:
+                log(f"s^{i:<5} {val_act:<15.5f} {val_des:<15.5f} {err:<12.1e}")
+            log("-" * 55)
 
             # 4. 打印传递函数
-            self.log("🧮 系统传递函数形式:")
-            self.log_transfer_function("控制器 C(s)", Bc, Ac)
+            log("🧮 系统传递函数形式:")
+            q.put(("tf", "控制器 C(s)", Bc, Ac))
             CL_num = PolynomialUtils.multiply(num, Bc)
-            CL_den = actual_poly 
-            self.log_transfer_function("闭环系统 T(s)", CL_num, CL_den)
-            self.log("-" * 55)
+            CL_den = actual_poly
+            q.put(("tf", "闭环系统 T(s)", CL_num, CL_den))
+            log("-" * 55)
 
             # 5. 稳定性校验
-            is_stable = RouthStability.check(actual_poly)
+            with profiler.stage("gui.routh"):
+                is_stable = RouthStability.check(actual_poly)
             status = "稳定" if is_stable else "不稳定"
-            self.log(f"🔒 劳斯稳定性检查：{status}", "success" if is_stable else "warning")
-            if not is_stable: self.log("⚠️ 警告：闭环理论不稳定！", "warning")
+            log(f"🔒 劳斯稳定性检查：{status}", "success" if is_stable else "warning")
+            if not is_stable: log("⚠️ 警告：闭环理论不稳定！", "warning")
+
+            # 5b. 频域裕度 (开环 Gc·Gp，无需时域仿真)
+            with profiler.stage("gui.margins"):
+                m = FrequencyAnalyzer(num, den, Bc, Ac).margins()
+            gm_txt = "∞" if not np.isfinite(m["gm_db"]) else f"{m['gm_db']:.2f}dB @ {m['w_pc']:.3g}rad/s"
+            pm_txt = "∞" if not np.isfinite(m["pm"]) else f"{m['pm']:.2f}° @ {m['w_gc']:.3g}rad/s"
+            log(f"📐 频域裕度：GM={gm_txt} | PM={pm_txt} | 闭环带宽={m['bandwidth']:.3g}rad/s")
 
             # 6. 时域仿真 (含防卡死 + 抗饱和)
-            sim_ctrl = CustomSimulator(Bc, Ac)
-            sim_plant = CustomSimulator(num, den)
-
-            # [重要优化]：防卡死策略
-            # 1. 计算理论上的 dt
-            dt_perf = ts / 200.0
-            
-            # 2. 计算刚性限制的 dt
-            max_plant_coeff = max(np.abs(den)) if den else 0
-            max_ctrl_coeff = max(np.abs(Ac)) if Ac else 0
-            global_max_coeff = max(max_plant_coeff, max_ctrl_coeff)
-            
-            dt_stiff = 0.01
-            if global_max_coeff > 1000: dt_stiff = 0.001
-            if global_max_coeff > 10000: dt_stiff = 0.0001
-            if global_max_coeff > 100000: dt_stiff = 1e-5
-            
-            dt = min(dt_perf, dt_stiff)
-            dt = max(1e-7, dt)
-            
-            # 自适应仿真时长
-            t_end = max(ts * 8.0, 5.0) 
-            
-            # 3. [性能核心优化]：限制最大点数，防止界面卡死
-            MAX_POINTS = 50000
-            total_points = int(t_end / dt)
-            if total_points > MAX_POINTS:
-                dt = t_end / MAX_POINTS
-                self.log(f"⚠️ 警告：仿真点数过多，已自动调整 dt = {dt:.2e}s", "warning")
-            
-            t_data = np.arange(0, t_end, dt)
-            y_list = []
-            u_list = []
-            y_curr = sim_plant.compute_output(0.0)
-            
-            self.log(f"⚙️ 启动仿真 (dt={dt:.1e}s, t_end={t_end:.1f}s)...", "info")
-            
-            for t in t_data:
-                r_val = t if in_type == 'ramp' else 1.0
-                error = r_val - y_curr
-                u_raw = sim_ctrl.compute_output(error)
-                
-                # 执行器限幅
-                in_saturation = False
-                if u_raw > ulim: 
-                    u_act = ulim
-                    in_saturation = True
-                elif u_raw < -ulim: 
-                    u_act = -ulim
-                    in_saturation = True
-                else: 
-                    u_act = u_raw
-                
-                y_list.append(y_curr)
-                u_list.append(u_act)
-                
-                # Clamping 抗饱和
-                should_update = True
-                if in_saturation:
-                    if (u_act > 0 and u_raw > ulim and error > 0) or \
-                       (u_act < 0 and u_raw < -ulim and error < 0):
-                        should_update = False
-                
-                if should_update:
-                    sim_ctrl.update_state(error, dt)
-                
-                sim_plant.update_state(u_act, dt)
-                y_curr = sim_plant.compute_output(u_act)
-
-            y_data = np.array(y_list)
-            u_data = np.array(u_list)
-            
-            if in_type == 'ramp':
-                target_curve = t_data
-                target_val = t_data[-1]
-            else:
-                target_curve = np.ones_like(t_data)
-                target_val = 1.0
-
-            # 7. 绘图
-            self.setup_plot_style("系统响应 y(t)", self.ax1)
-            self.ax1.plot(t_data, target_curve, 'r--', label='参考输入')
-            self.ax1.plot(t_data, y_data, 'b', linewidth=1, label='系统输出')
-            self.ax1.legend(prop={'size': 9})
-            
-            self.setup_plot_style("控制量 u(t) [Clamping抗饱和]", self.ax2)
-            self.ax2.plot(t_data, u_data, 'g', linewidth=1, label='控制量')
-            self.ax2.axhline(ulim, color='k', linestyle=':', alpha=0.3, label='限幅值')
-            self.ax2.axhline(-ulim, color='k', linestyle=':', alpha=0.3)
-            self.ax2.legend(prop={'size': 9})
-
-            # 8. 指标计算与显示 (使用封装好的 Simulator)
+            # ZOH 精确离散：各环节对任意 dt 均精确且稳定，不再需要按系数大小的刚性步长限制
+            engine = ClosedLoopSimulator(num, den, Bc, Ac, ulim, in_type, method='zoh')
+
+            # [重要优化]：防卡死策略 (步长/时长/点数上限)
+            dt, t_end, capped = select_time_step(ts, actual_poly)
+            if capped:
+                log(f"⚠️ 警告：仿真点数过多，已自动调整 dt = {dt:.2e}s", "warning")
+
+            log(f"⚙️ 启动仿真 (dt={dt:.1e}s, t_end={t_end:.1f}s)...", "info")
+            q.put(("sim_start", t_end, ulim))
+
+            # 每段轨迹复制后送回主线程；返回 True 即取消
+            def progress(t, y, u):
+                q.put(("trace", t.copy(), y.copy(), u.copy()))
+                return cancel.is_set()
+
+            with profiler.stage("gui.simulate"):
+                t_data, y_data, u_data = engine.run(dt, t_end, progress=progress)
+            if engine.cancelled:
+                q.put(("cancelled",))
+                return
+            target_val = t_data[-1] if in_type == 'ramp' else 1.0
+            with profiler.stage("gui.metrics"):
+                metrics = add_actuator_metrics(PerformanceAnalyzer(t_data, y_data, target_val).get_metrics(),
+                                               u_data, ulim)
+            res = {
+                "Bc": Bc, "Ac": Ac, "r_added": r_added, "zeta": zeta, "wn": wn,
+                "desired_poly": desired_poly, "actual_poly": actual_poly, "stable": is_stable,
+                "dt": dt, "t_end": t_end, "dt_capped": capped, "solver_stats": None,
+                "stopped_early": False, "t_stop": engine.t_stop,
+                "t": t_data, "y": y_data, "u": u_data, "target_val": target_val, "metrics": metrics,
+            }
+            self.result_cache.put(key, res)
+            self._archive_run(inputs, res, table, key, log)
+            q.put(("done", t_data, y_data, u_data, ulim, in_type, metrics))
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            q.put(("error", str(e)))
+
+    def _replay_cached(self, num, inputs, key, res, q, log):
+        """缓存命中：由缓存结果回放控制器信息与传递函数，直接进入绘图"""
+        log("⚡ 命中结果缓存，跳过设计与仿真", "success")
+        Bc, Ac, actual_poly = res["Bc"], res["Ac"], res["actual_poly"]
+        q.put(("controller", Bc, Ac, res["r_added"], res["zeta"], res["wn"]))
+        q.put(("tf", "控制器 C(s)", Bc, Ac))
+        q.put(("tf", "闭环系统 T(s)", PolynomialUtils.multiply(num, Bc), actual_poly))
+        if not res["stable"]: log("⚠️ 警告：闭环理论不稳定！", "warning")
+        self._archive_run(inputs, res, diophantine_table(actual_poly, res["desired_poly"]), key, log)
+        q.put(("done", res["t"], res["y"], res["u"], inputs["ulim"], inputs["input_type"], res["metrics"]))
+
+    def _archive_run(self, inputs, res, table, key, log):
+        """归档本次设计 (后台线程调用；同一结果键已归档则跳过，超出保留上限时淘汰旧归档；失败只记日志)"""
+        try:
+            with profiler.stage("gui.archive"):
+                if find_run(self.archive_dir, key) is not None: return
+                save_run(os.path.join(self.archive_dir, run_filename(tag=key[:8])), inputs, res, table, key=key)
+                prune_runs(self.archive_dir)
+        except OSError as e:
+            log(f"⚠️ 归档失败：{e}", "warning")
+
+    # 对比窗口中显示图例的最多曲线数
+    COMPARE_LEGEND_MAX = 10
+
+    def show_run_compare(self):
+        """新窗口：列出已归档的设计 (只读文件头)，多选后叠加对比输出与控制量 (轨迹按需加载)"""
+        with profiler.stage("gui.archive_list"):
+            runs = list_runs(self.archive_dir)
+        if not runs:
+            self.log("ℹ️ 暂无已归档的设计", "info")
+            return
+        _load_plotting()
+
+        win = tk.Toplevel(self.root)
+        win.title(f"历史设计对比 ({len(runs)} 条)")
+        win.geometry("1200x600")
+        side = ttk.Frame(win, padding=5)
+        side.pack(side=LEFT, fill=Y)
+        cols = (("time", "时间", 120), ("plant", "对象 num / den", 160), ("spec", "MP/Ts/限幅", 110),
+                ("os", "超调%", 60), ("ts", "Ts(s)", 60))
+        tree = ttk.Treeview(side, columns=[c[0] for c in cols], show="headings", selectmode="extended", height=24)
+        for c, text, width in cols:
+            tree.heading(c, text=text)
+            tree.column(c, width=width, anchor=W)
+        for i, run in enumerate(runs):
+            p, m = run.inputs, run.metrics
+            tree.insert("", END, iid=str(i), values=(
+                time.strftime("%m-%d %H:%M:%S", time.localtime(run.created)),
+                f"{' '.join(f'{c:g}' for c in p['num'])} / {' '.join(f'{c:g}' for c in p['den'])}",
+                f"{p['mp']:g}/{p['ts']:g}/{p['ulim']:g}",
+                f"{m.get('overshoot', 0.0):.2f}", f"{m.get('ts', 0.0):.2f}",
+            ))
+        tree.pack(fill=Y, expand=YES)
+
+        fig = Figure(figsize=(7, 5.5), dpi=100, facecolor='#ffffff')
+        ax1 = fig.add_subplot(211)
+        ax2 = fig.add_subplot(212)
+        fig.subplots_adjust(hspace=0.3)
+        canvas = FigureCanvasTkAgg(fig, master=win)
+        canvas.get_tk_widget().pack(side=RIGHT, fill=BOTH, expand=YES)
+
+        def plot_selected():
+            sel = [runs[int(i)] for i in tree.selection()]
+            if not sel: return
+            with profiler.stage("gui.archive_compare"):
+                self.setup_plot_style("系统响应 y(t) 对比", ax1)
+                self.setup_plot_style("控制量 u(t) 对比", ax2)
+                # 曲线集合不参与自动缩放，按全部轨迹一次设定坐标范围
+                t_end = max((run.t[-1] for run in sel if len(run.t)), default=1.0)
+                for ax, name in ((ax1, "y"), (ax2, "u")):
+                    vals = [run.trace(name) for run in sel]
+                    lo = min((float(np.nanmin(v)) for v in vals if len(v)), default=0.0)
+                    hi = max((float(np.nanmax(v)) for v in vals if len(v)), default=1.0)
+                    pad = 0.05 * max(hi - lo, 1e-9)
+                    ax.set_xlim(0, t_end)
+                    if np.isfinite(lo) and np.isfinite(hi): ax.set_ylim(lo - pad, hi + pad)
+                # 全部曲线放入一个集合绘制，数百条时重绘仍然很快
+                ts_list = [run.t for run in sel]
+                lines = DecimatedCollection(ax1, ts_list, [run.y for run in sel], linewidths=1)
+                DecimatedCollection(ax2, ts_list, [run.u for run in sel], colors=lines.colors, linewidths=1)
+                if len(sel) <= self.COMPARE_LEGEND_MAX:
+                    handles = [Line2D([], [], color=c, linewidth=1,
+                                      label=f"MP={r.inputs['mp']:g} Ts={r.inputs['ts']:g} 限幅={r.inputs['ulim']:g}")
+                               for r, c in zip(sel, lines.colors)]
+                    ax1.legend(handles=handles, prop={'size': 8})
+                canvas.draw_idle()
+
+        ttk.Button(side, text="📈 叠加对比所选", command=plot_selected, bootstyle="success").pack(fill=X, pady=(5, 0))
+        canvas.draw()
+
+    def _poll_queue(self):
+        """主线程：取出后台消息并更新界面；仿真轨迹在一次轮询内合并后重绘一次"""
+        finished = False
+        new_trace = False
+        try:
+            while True:
+                msg = self._queue.get_nowait()
+                kind = msg[0]
+                if kind == "log": self.log(msg[1], msg[2])
+                elif kind == "tf": self.log_transfer_function(*msg[1:])
+                elif kind == "controller": self.update_controller_info(*msg[1:])
+                elif kind == "sim_start": self._start_live_plot(*msg[1:])
+                elif kind == "trace":
+                    self._trace_parts.append(msg[1:])
+                    new_trace = True
+                elif kind == "done":
+                    with profiler.stage("gui.plot"):
+                        self.plot_results(*msg[1:])
+                    new_trace = False
+                    finished = True
+                elif kind == "cancelled":
+                    self.log("⏹️ 仿真已取消", "warning")
+                    finished = True
+                elif kind == "error":
+                    self.log(f"❌ 错误：{msg[1]}", "error")
+                    finished = True
+        except queue.Empty:
+            pass
+
+        if new_trace: self._update_live_plot()
+        if finished or (not self._worker.is_alive() and self._queue.empty()):
+            self.btn_run.configure(state=NORMAL, text="🚀 开始设计")
+            self.btn_cancel.configure(state=DISABLED)
+            if finished: self.canvas.draw_idle()
+            if profiler.is_enabled(): self.report_profile()
+            if self._live_pending:
+                self._live_pending = False
+                self.schedule_live_update()
+        else:
+            self.root.after(self.POLL_MS, self._poll_queue)
+
+    def report_profile(self):
+        """剖析结果写入日志，并导出 JSON 与 Chrome trace 到临时目录"""
+        profiler.disable()
+        self.log("-" * 55)
+        self.log("⏱️ 各阶段耗时与内存净分配:" if self.var_profile_alloc.get() else "⏱️ 各阶段耗时:")
+        self.log(profiler.format_summary())
+        base = os.path.join(tempfile.gettempdir(), "siso_profile")
+        profiler.export_json(base + ".json")
+        profiler.export_chrome_trace(base + "_trace.json")
+        self.log(f"已导出: {base}.json / {base}_trace.json (chrome://tracing)")
+
+    def _start_live_plot(self, t_end, ulim):
+        """仿真开始：清空坐标轴并创建待增量填充的曲线"""
+        self._trace_parts = []
+        self.blit.clear()
+        self.setup_plot_style("系统响应 y(t)", self.ax1)
+        self.setup_plot_style("控制量 u(t) [Clamping抗饱和]", self.ax2)
+        self.ax1.set_xlim(0, t_end)
+        self.ax2.set_xlim(0, t_end)
+        self._live_y = DecimatedLine(self.ax1, [], [], 'b', linewidth=1, label='系统输出')
+        self._live_u = DecimatedLine(self.ax2, [], [], 'g', linewidth=1, label='控制量')
+        self.blit.add_artist(self._live_y.line)
+        self.blit.add_artist(self._live_u.line)
+        # 整图绘制一次，缓存坐标轴背景
+        self.canvas.draw_idle()
+
+    def _update_live_plot(self):
+        if len(self._trace_parts) > 1:
+            self._trace_parts = [tuple(np.concatenate(c) for c in zip(*self._trace_parts))]
+        t, y, u = self._trace_parts[0]
+        rescale = False
+        for line, ax, v in ((self._live_y, self.ax1, y), (self._live_u, self.ax2, u)):
+            line.set_data(t, v, autoscale=False)
+            # 数据超出当前 y 范围时才放大坐标轴并整图重绘，否则只 blit 曲线
+            v = v[np.isfinite(v)]
+            if not len(v): continue
+            lo, hi = ax.get_ylim()
+            if v.min() < lo or v.max() > hi:
+                pad = 0.1 * max(v.max() - v.min(), 1e-9)
+                ax.set_ylim(min(lo, v.min() - pad), max(hi, v.max() + pad))
+                rescale = True
+        if rescale: self.canvas.draw_idle()
+        else: self.blit.update()
+
+    def plot_results(self, t_data, y_data, u_data, ulim, in_type, metrics=None, verbose=True):
+        """
+        仿真完成：绘制完整曲线、标注并计算指标
+        metrics: 已计算好的指标 (为 None 时在此计算)；verbose=False 时不写日志 (实时预览)
+        """
+        if in_type == 'ramp':
+            target_curve = t_data
+            target_val = t_data[-1]
+        else:
+            target_curve = np.ones_like(t_data)
+            target_val = 1.0
+
+        # 7. 绘图 (曲线按像素宽度降采样，缩放时自动按可见范围重新降采样)
+        self.blit.clear()
+        self.setup_plot_style("系统响应 y(t)", self.ax1)
+        DecimatedLine(self.ax1, t_data, target_curve, 'r--', label='参考输入')
+        DecimatedLine(self.ax1, t_data, y_data, 'b', linewidth=1, label='系统输出')
+        self.ax1.legend(prop={'size': 9})
+
+        self.setup_plot_style("控制量 u(t) [Clamping抗饱和]", self.ax2)
+        DecimatedLine(self.ax2, t_data, u_data, 'g', linewidth=1, label='控制量')
+        self.ax2.axhline(ulim, color='k', linestyle=':', alpha=0.3, label='限幅值')
+        self.ax2.axhline(-ulim, color='k', linestyle=':', alpha=0.3)
+        self.ax2.legend(prop={'size': 9})
+
+        # 8. 指标计算与显示 (使用封装好的 Simulator)
+        if metrics is None:
             analyzer = PerformanceAnalyzer(t_data, y_data, target_val)
             metrics = analyzer.get_metrics()
-            
-            if in_type == 'step':
-                tr = metrics['tr'] 
-                ess = metrics['error']
-                
-                self.log(f"📊 [阶跃]指标: MP={metrics['overshoot']:.2f}% | Ts={metrics['ts']:.2f}s | Tr={tr:.2f}s | ess={ess:.1e}")
-                
-                # 绘图标注
-                tp = metrics['tp']
-                peak_val = y_data[np.argmax(y_data)]
-                self.ax1.axvline(x=tp, color='green', linestyle='--', alpha=0.6, linewidth=1)
-                self.ax1.plot(tp, peak_val, 'ro', markersize=4)
-                self.ax1.text(tp, peak_val*1.02, "Tp", color='green', fontsize=9, ha='center', fontweight='bold')
-
-                ts = metrics['ts']
-                if ts > 0:
-                    self.ax1.axvline(x=ts, color='magenta', linestyle='--', alpha=0.6, linewidth=1)
-                    self.ax1.text(ts, target_val*0.9, "Ts", color='magenta', fontsize=9, ha='right', fontweight='bold')
-
-                info = (f"Step Response:\n"
-                        f"--------------\n"
-                        f"OS : {metrics['overshoot']:5.2f} %\n"
-                        f"Tp : {metrics['tp']:5.2f} s\n"
-                        f"Tr : {tr:5.2f} s\n"
-                        f"Ts : {metrics['ts']:5.2f} s\n"
-                        f"Ess: {ess:.1e}") 
-
-            elif in_type == 'ramp':
-                final_error = metrics['error']
-                
+
+        if in_type == 'step':
+            tr = metrics['tr']
+            ess = metrics['error']
+
+            if verbose: self.log(f"📊 [阶跃]指标: MP={metrics['overshoot']:.2f}% | Ts={metrics['ts']:.2f}s | Tr={tr:.2f}s | ess={ess:.1e}")
+
+            # 绘图标注
+            tp = metrics['tp']
+            peak_val = y_data[np.argmax(y_data)]
+            self.ax1.axvline(x=tp, color='green', linestyle='--', alpha=0.6, linewidth=1)
+            self.ax1.plot(tp, peak_val, 'ro', markersize=4)
+            self.ax1.text(tp, peak_val*1.02, "Tp", color='green', fontsize=9, ha='center', fontweight='bold')
+
+            ts = metrics['ts']
+            if ts > 0:
+                self.ax1.axvline(x=ts, color='magenta', linestyle='--', alpha=0.6, linewidth=1)
+                self.ax1.text(ts, target_val*0.9, "Ts", color='magenta', fontsize=9, ha='right', fontweight='bold')
+
+            info = (f"Step Response:\n"
+                    f"--------------\n"
+                    f"OS : {metrics['overshoot']:5.2f} %\n"
+                    f"Tp : {metrics['tp']:5.2f} s\n"
+                    f"Tr : {tr:5.2f} s\n"
+                    f"Ts : {metrics['ts']:5.2f} s\n"
+                    f"Ess: {ess:.1e}")
+
+        elif in_type == 'ramp':
+            final_error = metrics['error']
+
+            if verbose:
                 self.log(f"📊 [斜坡]指标: 稳态跟踪误差 ess ≈ {final_error:.1e}")
                 self.log("ℹ️ 提示: 斜坡响应不适用超调量/调节时间指标")
 
-                info = (f"Ramp Response:\n"
-                        f"--------------\n"
-                        f"Tracking Err:\n"
-                        f"ess ≈ {final_error:.1e}")
+            info = (f"Ramp Response:\n"
+                    f"--------------\n"
+                    f"Tracking Err:\n"
+                    f"ess ≈ {final_error:.1e}")
 
-            self.ax1.text(0.96, 0.04, info, transform=self.ax1.transAxes,
-                          verticalalignment='bottom', horizontalalignment='right',
-                          bbox=dict(boxstyle="round,pad=0.5", fc="white", alpha=0.9, ec="#bdc3c7"),
-                          fontsize=9, family='monospace', color='#2c3e50')
+        self.ax1.text(0.96, 0.04, info, transform=self.ax1.transAxes,
+                      verticalalignment='bottom', horizontalalignment='right',
+                      bbox=dict(boxstyle="round,pad=0.5", fc="white", alpha=0.9, ec="#bdc3c7"),
+                      fontsize=9, family='monospace', color='#2c3e50')
 
-            self.canvas.draw()
+        self.canvas.draw()
 
-        except Exception as e:
-            self.log(f"❌ 错误：{str(e)}", "error")
-            import traceback
-            traceback.print_exc()
-        finally:
-            self.btn_run.configure(state=NORMAL, text="🚀 开始设计")
+def launch(themename="flatly"):
+    """创建主窗口与应用 (不进入事件循环)"""
+    _load_gui()
+    return AutoControlApp(ttk.Window(themename=themename))
 
 if __name__ == "__main__":
-    root = ttk.Window(themename="flatly")
-    app = AutoControlApp(root)
-    root.mainloop()
\ No newline at end of file
+    launch().root.mainloop()
\ No newline at end of file
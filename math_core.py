@@ -1,37 +1,184 @@
 import numpy as np
 from typing import List, Union
+from profiler import profiled
+
+def _as_coeffs(coeffs) -> np.ndarray:
+    """系数转为一维数组：复数保持 complex128，其余统一为 float64"""
+    c = np.atleast_1d(np.asarray(coeffs))
+    return c.astype(complex if c.dtype.kind == 'c' else float, copy=False)
+
+class Polynomial:
+    """
+    数组存储的多项式 (升幂系数 c[0] + c[1]s + ...)
+    乘法走卷积，高阶时自动切换 FFT；求值为数组化 Horner；修剪操作原地进行
+    """
+    __slots__ = ('c',)
+    # 两个因子长度都不小于该值时使用 FFT 卷积
+    FFT_THRESHOLD = 256
+
+    def __init__(self, coeffs=(0.0,)):
+        self.c = _as_coeffs(coeffs.c if isinstance(coeffs, Polynomial) else coeffs).copy()
+
+    @classmethod
+    def _wrap(cls, c: np.ndarray) -> 'Polynomial':
+        """直接持有已分配好的数组 (不复制)"""
+        p = cls.__new__(cls)
+        p.c = c
+        return p
+
+    @staticmethod
+    def coeffs_from_roots(roots) -> np.ndarray:
+        """
+        批量由根构造首一多项式系数 (升幂)：roots 形状 (..., m) -> 系数 (..., m+1)
+        逐个乘入因子 (s - r)，每步对所有批次成员向量化 (单个多项式用 from_roots 即可)
+        """
+        roots = np.asarray(roots)
+        m = roots.shape[-1]
+        dtype = complex if roots.dtype.kind == 'c' else float
+        c = np.zeros(roots.shape[:-1] + (m + 1,), dtype=dtype)
+        c[..., 0] = 1.0
+        for k in range(m):
+            r = roots[..., k, None]
+            c[..., 1:k+2] = c[..., 0:k+1] - r * c[..., 1:k+2]
+            c[..., 0:1] *= -r
+        if dtype is complex:
+            # 根共轭成对时虚部只剩舍入误差，取实部
+            scale = np.max(np.abs(c), axis=-1, keepdims=True)
+            if np.all(np.abs(c.imag) <= 1e-12 * np.maximum(scale, 1.0)):
+                c = c.real.copy()
+        return c
+
+    @classmethod
+    def from_roots(cls, roots) -> 'Polynomial':
+        """由根构造首一多项式；根为共轭成对出现时返回实系数"""
+        return cls._wrap(np.poly(roots)[::-1].copy())
+
+    @property
+    def degree(self) -> int:
+        return len(self.c) - 1
+
+    def __len__(self):
+        return len(self.c)
+
+    def __repr__(self):
+        return f"Polynomial({self.c.tolist()!r})"
+
+    def tolist(self) -> list:
+        return self.c.tolist()
+
+    @staticmethod
+    def convolve(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """系数卷积 (高阶时使用 FFT)"""
+        if len(a) == 0 or len(b) == 0:
+            return np.zeros(max(0, len(a) + len(b) - 1))
+        if min(len(a), len(b)) < Polynomial.FFT_THRESHOLD:
+            return np.convolve(a, b)
+        n = len(a) + len(b) - 1
+        nfft = 1 << (n - 1).bit_length()
+        if a.dtype.kind == 'c' or b.dtype.kind == 'c':
+            return np.fft.ifft(np.fft.fft(a, nfft) * np.fft.fft(b, nfft))[:n]
+        return np.fft.irfft(np.fft.rfft(a, nfft) * np.fft.rfft(b, nfft), nfft)[:n]
+
+    def __mul__(self, other):
+        if np.isscalar(other):
+            return Polynomial._wrap(self.c * other)
+        other = other.c if isinstance(other, Polynomial) else _as_coeffs(other)
+        return Polynomial._wrap(Polynomial.convolve(self.c, other))
+
+    __rmul__ = __mul__
+
+    def __add__(self, other):
+        other = other.c if isinstance(other, Polynomial) else _as_coeffs(other)
+        a, b = (self.c, other) if len(self.c) >= len(other) else (other, self.c)
+        res = a.astype(np.result_type(a, b))
+        res[:len(b)] += b
+        return Polynomial._wrap(res)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Polynomial._wrap(-self.c)
+
+    def __sub__(self, other):
+        other = other.c if isinstance(other, Polynomial) else _as_coeffs(other)
+        return self + (-other)
+
+    def __call__(self, x):
+        return Polynomial.horner(self.c, x)
+
+    @staticmethod
+    def horner(c: np.ndarray, x):
+        """Horner 求值，x 可为任意形状的数组 (逐点向量化)"""
+        x = np.asarray(x)
+        if len(c) == 0: return np.zeros(x.shape)
+        y = np.full(x.shape, c[-1], dtype=np.result_type(c, x))
+        for ck in c[-2::-1]:
+            y *= x
+            y += ck
+        return y
+
+    def derivative(self) -> 'Polynomial':
+        if len(self.c) <= 1: return Polynomial([0.0])
+        return Polynomial._wrap(self.c[1:] * np.arange(1, len(self.c)))
+
+    def filter_small(self, eps: float = 1e-9) -> 'Polynomial':
+        """原地将绝对值小于 eps 的系数置零 (长度不变)"""
+        self.c[np.abs(self.c) < eps] = 0
+        return self
+
+    def trim(self, eps: float = 1e-9) -> 'Polynomial':
+        """原地去掉高次端绝对值不超过 eps 的系数 (eps=0 时只去掉精确零；至少保留常数项，不复制数据)"""
+        nz = np.flatnonzero(np.abs(self.c) > eps)
+        self.c = self.c[:nz[-1] + 1] if len(nz) else self.c[:1]
+        return self
+
+    def roots(self) -> np.ndarray:
+        return np.roots(self.c[::-1])
 
 class PolynomialUtils:
-    """多项式基础运算工具"""
+    """
+    多项式基础运算工具 (基于 Polynomial 的列表接口兼容层)
+    低阶输入直接在列表/数组上运算，省去 Polynomial 对象的构造与转换开销
+    """
+    # 乘积项数不超过该值时逐项相乘 (比 np.convolve 的数组转换更快)
+    SMALL_TERMS = 16
+    # 加法：长度不超过该值时直接逐项相加
+    SMALL_SIZE = 32
+
     @staticmethod
     def multiply(p1: List[float], p2: List[float]) -> List[float]:
-        n = len(p1) + len(p2) - 1
-        res = [0.0] * n
-        for i in range(len(p1)):
-            for j in range(len(p2)):
-                res[i + j] += p1[i] * p2[j]
-        return PolynomialUtils.filter_small_coeffs(res)
+        n1, n2 = len(p1), len(p2)
+        if n1 * n2 <= PolynomialUtils.SMALL_TERMS:
+            res = [0.0] * (n1 + n2 - 1)
+            for i, a in enumerate(p1):
+                for j, b in enumerate(p2):
+                    res[i + j] += a * b
+        elif min(n1, n2) < Polynomial.FFT_THRESHOLD:
+            res = np.convolve(p1, p2).tolist()
+        else:
+            return (Polynomial(p1) * p2).filter_small().tolist()
+        return PolynomialUtils._filter(res)
 
     @staticmethod
     def add(p1: List[float], p2: List[float]) -> List[float]:
-        n = max(len(p1), len(p2))
-        res = [0.0] * n
-        for i in range(len(p1)): res[i] += p1[i]
-        for i in range(len(p2)): res[i] += p2[i]
-        return PolynomialUtils.filter_small_coeffs(res)
+        if max(len(p1), len(p2)) > PolynomialUtils.SMALL_SIZE:
+            return (Polynomial(p1) + p2).filter_small().tolist()
+        if len(p1) < len(p2): p1, p2 = p2, p1
+        res = list(p1)
+        for i, c in enumerate(p2): res[i] += c
+        return PolynomialUtils._filter(res)
+
+    @staticmethod
+    def _filter(poly: list, eps: float = 1e-9) -> list:
+        return [0.0 if abs(c) < eps else c for c in poly]
     
     @staticmethod
     def derivative(poly: List[float]) -> List[float]:
-        n = len(poly)
-        if n <= 1: return [0.0]
-        res = []
-        for i in range(1, n):
-            res.append(poly[i] * i)
-        return res
+        return Polynomial(poly).derivative().tolist()
 
     @staticmethod
     def filter_small_coeffs(poly: List[float], eps: float = 1e-9) -> List[float]:
-        return [0.0 if abs(c) < eps else c for c in poly]
+        return Polynomial(poly).filter_small(eps).tolist()
 
     @staticmethod
     def to_str(poly: List[float], var: str = 's') -> str:
@@ -68,11 +215,12 @@ class PolynomialUtils:
 
 class RouthStability:
     @staticmethod
+    @profiled("routh.check")
     def check(coeff_asc: List[float]) -> bool:
         """劳斯判据稳定性检查 (完整鲁棒版)"""
         coeff = coeff_asc[::-1]
         while len(coeff) > 0 and abs(coeff[0]) < 1e-9: coeff.pop(0)
-        if not coeff: return True
+        if len(coeff) <= 1: return True
         n = len(coeff)
         cols = (n + 1) // 2
         R = np.zeros((n, cols))
@@ -97,6 +245,121 @@ class RouthStability:
         base_sign = valid_signs[0]
         return all(s == base_sign for s in valid_signs)
 
+    @staticmethod
+    @profiled("routh.check_batch")
+    def check_batch(coeffs_asc, eps: float = 1e-9):
+        """
+        批量劳斯判据：coeffs_asc 为 (N, degree+1) 升幂系数矩阵
+        按有效阶次分组，同组所有劳斯表逐行向量化填充 (全零行 / 零主元的处理与 check 一致)
+        返回: stable (N,) bool, n_rhp (N,) int —— 右半平面根个数 (首列符号变化次数，
+              表中出现 NaN 时无法判定，记为 -1 且视为不稳定)
+        """
+        P = np.array(coeffs_asc, dtype=float, ndmin=2)[:, ::-1]
+        N, L = P.shape
+        stable = np.ones(N, dtype=bool)
+        n_rhp = np.zeros(N, dtype=int)
+
+        # 去掉最高次端的零系数后的有效长度
+        nz = np.abs(P) >= eps
+        lead = np.where(nz.any(axis=1), nz.argmax(axis=1), L)
+        n_eff = L - lead
+
+        for n in np.unique(n_eff):
+            if n <= 1: continue
+            rows = np.flatnonzero(n_eff == n)
+            D = P[rows[:, None], lead[rows][:, None] + np.arange(n)]
+            B, cols = len(rows), (n + 1) // 2
+            R = np.zeros((B, n, cols))
+            R[:, 0, :len(range(0, n, 2))] = D[:, 0::2]
+            R[:, 1, :len(range(1, n, 2))] = D[:, 1::2]
+            with np.errstate(all='ignore'):
+                for i in range(2, n):
+                    # 全零行：用上一行构成的辅助多项式求导代替
+                    zero_row = np.all(np.abs(R[:, i-1, :]) < eps, axis=1)
+                    if zero_row.any():
+                        power = (n - 1 - (i - 2)) - 2 * np.arange(cols)
+                        R[zero_row, i-1, :] = np.where(power >= 0, R[zero_row, i-2, :] * power, R[zero_row, i-1, :])
+                    # 零主元：以小量 ε 代替
+                    piv = R[:, i-1, 0]
+                    piv[np.abs(piv) < eps] = 1e-6
+                    a, b = R[:, i-2, 0:1], R[:, i-2, 1:]
+                    c, d = R[:, i-1, 0:1], R[:, i-1, 1:]
+                    R[:, i, :cols-1] = (c * b - a * d) / c
+
+            first_col = R[:, :, 0]
+            has_nan = np.isnan(first_col).any(axis=1)
+            valid = np.abs(first_col) > 1e-7
+            sign = np.sign(first_col)
+            # 只在有效元素之间统计符号变化：记录每个位置之前最近一个有效元素的下标
+            last = np.maximum.accumulate(np.where(valid, np.arange(n), -1), axis=1)
+            prev = np.concatenate([np.full((B, 1), -1), last[:, :-1]], axis=1)
+            prev_sign = np.take_along_axis(sign, np.maximum(prev, 0), axis=1)
+            changes = (valid & (prev >= 0) & (sign != prev_sign)).sum(axis=1)
+
+            n_rhp[rows] = np.where(has_nan, -1, changes)
+            stable[rows] = ~has_nan & (changes == 0)
+        return stable, n_rhp
+
+class MatrixUtils:
+    # Padé(6,6) 系数 (Moler & Van Loan)
+    _PADE6 = (1.0, 1/2, 5/44, 1/66, 1/792, 1/15840, 1/665280)
+
+    @staticmethod
+    @profiled("matrix.expm")
+    def expm(M: np.ndarray) -> np.ndarray:
+        """矩阵指数 e^M (缩放-平方 + Padé(6,6) 近似)，支持 (..., n, n) 批量输入"""
+        M = np.asarray(M, dtype=float)
+        n = M.shape[-1]
+        if n == 0: return np.zeros(M.shape)
+        norm = float(np.max(np.abs(M).sum(axis=-1)))
+        s = max(0, int(np.ceil(np.log2(norm / 0.5)))) if norm > 0 else 0
+        X = M / (2.0 ** s)
+        c = MatrixUtils._PADE6
+        I = np.eye(n)
+        X2 = X @ X
+        X4 = X2 @ X2
+        X6 = X4 @ X2
+        U = X @ (c[1] * I + c[3] * X2 + c[5] * X4)
+        V = c[0] * I + c[2] * X2 + c[4] * X4 + c[6] * X6
+        E = np.linalg.solve(V - U, V + U)
+        for _ in range(s): E = E @ E
+        return E
+
+    @staticmethod
+    @profiled("matrix.lu_factor")
+    def lu_factor(M: np.ndarray):
+        """
+        部分主元 LU 分解 (PA = LU，L 为单位下三角，与 U 合并存储)
+        返回: (LU, piv)；矩阵 (数值) 奇异时抛出 np.linalg.LinAlgError
+        """
+        LU = np.array(M, dtype=float)
+        n = LU.shape[0]
+        piv = np.arange(n)
+        for k in range(n):
+            p = k + int(np.argmax(np.abs(LU[k:, k])))
+            # 与 LAPACK getrf 一致：仅零主元判为奇异 (高阶对象的小主元属病态而非奇异)
+            if LU[p, k] == 0.0: raise np.linalg.LinAlgError("Singular matrix")
+            if p != k:
+                LU[[k, p]] = LU[[p, k]]
+                piv[[k, p]] = piv[[p, k]]
+            LU[k+1:, k] /= LU[k, k]
+            LU[k+1:, k+1:] -= np.outer(LU[k+1:, k], LU[k, k+1:])
+        return LU, piv
+
+    @staticmethod
+    def lu_solve(lu_piv, b: np.ndarray) -> np.ndarray:
+        """用 lu_factor 的结果求解 Mx = b，b 可为 (n,) 或 (n, K) 多右端项"""
+        LU, piv = lu_piv
+        X = np.array(b, dtype=float)[piv]
+        n = LU.shape[0]
+        Xm = X.reshape(n, -1)
+        for k in range(n - 1):
+            Xm[k+1:] -= np.outer(LU[k+1:, k], Xm[k])
+        for k in range(n - 1, -1, -1):
+            Xm[k] /= LU[k, k]
+            Xm[:k] -= np.outer(LU[:k, k], Xm[k])
+        return X
+
 class PoleUtils:
     @staticmethod
     def conjugate_pair(poles: List[Union[float, complex]]) -> List[Union[float, complex]]:
@@ -0,0 +1,264 @@
+import numpy as np
+from math_core import PolynomialUtils, RouthStability
+from algorithms import design_controller
+from simulator import ClosedLoopSimulator, PerformanceAnalyzer, StreamingPerformanceAnalyzer, load_reference, open_trace
+from result_cache import cache_key
+import profiler
+
+# 单次仿真的最大点数 (防止界面卡死 / 批量任务内存失控)
+MAX_POINTS = 50000
+
+def validate_specs(mp, ts, ulim):
+    """设计指标防呆校验 (与 GUI 输入校验一致)"""
+    if ts <= 1e-6: raise ValueError("调节时间 Ts 太小 (必须 > 1e-6s)")
+    if mp <= 0.01 or mp >= 100: raise ValueError("超调量 MP 必须在 0.01% - 100% 之间")
+    if ulim <= 0: raise ValueError("控制量限幅值必须为正数")
+
+def normalize_controller(Bc, Ac):
+    """控制器归一化：分母最高次系数化为 1"""
+    if abs(Ac[-1]) > 1e-9:
+        scale_factor = Ac[-1]
+        Ac = [c / scale_factor for c in Ac]
+        Bc = [c / scale_factor for c in Bc]
+    return Bc, Ac
+
+def closed_loop_poly(num, den, Bc, Ac):
+    """实际闭环特征多项式 den·Ac + num·Bc (丢番图方程左端)"""
+    return PolynomialUtils.add(PolynomialUtils.multiply(den, Ac), PolynomialUtils.multiply(num, Bc))
+
+def diophantine_table(actual_poly, desired_poly, tol=1e-9):
+    """
+    丢番图方程验证表 (实际闭环多项式 LHS 与期望多项式 RHS 逐项对比)
+    返回: [(幂次, 实际系数, 期望系数, 绝对误差)]，按幂次降序，略去两侧均为零的项
+    """
+    n = max(len(actual_poly), len(desired_poly))
+    act = list(actual_poly) + [0.0] * (n - len(actual_poly))
+    des = list(desired_poly) + [0.0] * (n - len(desired_poly))
+    return [(i, float(act[i]), float(des[i]), abs(float(act[i]) - float(des[i])))
+            for i in range(n - 1, -1, -1) if abs(act[i]) > tol or abs(des[i]) > tol]
+
+def select_time_step(ts, cl_poly, max_points=MAX_POINTS):
+    """
+    仿真步长与时长策略 (ZOH 离散下无需刚性步长限制)
+    返回: dt, t_end, capped (是否因点数上限放大了 dt)
+    """
+    # 1. 性能需求的 dt
+    dt_perf = ts / 200.0
+
+    # 2. 闭环采样限制：反馈回路每步保持误差不变，步长需远小于最快闭环极点的时间常数
+    cl_roots = np.roots(cl_poly[::-1])
+    w_max = float(np.max(np.abs(cl_roots))) if len(cl_roots) else 0.0
+    dt_loop = 0.2 / w_max if w_max > 1e-12 else dt_perf
+
+    dt = max(1e-7, min(dt_perf, dt_loop))
+
+    # 自适应仿真时长
+    t_end = max(ts * 8.0, 5.0)
+
+    # 3. 限制最大点数
+    capped = int(t_end / dt) > max_points
+    if capped: dt = t_end / max_points
+    return dt, t_end, capped
+
+def add_actuator_metrics(metrics, u_data, ulim):
+    """执行器使用情况：控制量峰值与饱和时间占比 (原地写入 metrics)"""
+    metrics["u_peak"] = float(np.max(np.abs(u_data))) if len(u_data) else 0.0
+    metrics["sat_ratio"] = float(np.mean(np.abs(u_data) >= ulim)) if len(u_data) else 0.0
+    return metrics
+
+class ActuatorStats:
+    """执行器使用情况的分块累计 (结果同 add_actuator_metrics，内存与轨迹长度无关)"""
+    def __init__(self, ulim):
+        self.ulim = ulim
+        self.u_peak = 0.0
+        self.n_sat = 0
+        self.count = 0
+
+    def update(self, u):
+        if len(u) == 0: return
+        a = np.abs(u)
+        self.u_peak = max(self.u_peak, float(np.max(a)))
+        self.n_sat += int(np.count_nonzero(a >= self.ulim))
+        self.count += len(a)
+
+    def apply(self, metrics):
+        """原地写入 metrics"""
+        metrics["u_peak"] = self.u_peak
+        metrics["sat_ratio"] = self.n_sat / self.count if self.count else 0.0
+        return metrics
+
+def design_cache_key(num, den, mp, ts, input_type='step', ulim=1000.0, method='zoh', early_stop=False):
+    """evaluate_design 结果的缓存键 (步长策略由 MAX_POINTS 决定，一并参与哈希)"""
+    return cache_key(num, den, mp, ts, input_type, ulim,
+                     method=method, early_stop=bool(early_stop), max_points=MAX_POINTS)
+
+def evaluate_design(num, den, mp, ts, input_type='step', ulim=1000.0, method='zoh', early_stop=False,
+                    cache=None):
+    """
+    无界面设计流水线：控制器设计 → 劳斯校验 → 闭环仿真 → 性能指标
+    method: 'zoh' / 'rk4' 为定步长采样仿真；'rk45' 为连续闭环的自适应步长仿真；
+            'analytic' 为无饱和时的解析 (模态) 响应，饱和时自动退回 ZOH 仿真；
+            'switched' 为连续闭环按饱和模式分段的矩阵指数精确推进
+    early_stop: 阶跃响应稳定后提前结束仿真 (静默窗口取一个期望调节时间 ts；斜坡输入下状态持续增长，不适用)
+    cache: 可选 ResultCache，相同参数的重复调用直接返回缓存结果 (设计失败不缓存)
+    返回包含控制器、闭环多项式、仿真轨迹与指标的 dict
+    """
+    validate_specs(mp, ts, ulim)
+    if cache is not None:
+        key = design_cache_key(num, den, mp, ts, input_type, ulim, method, early_stop)
+        res = cache.get(key)
+        if res is None:
+            res = evaluate_design(num, den, mp, ts, input_type, ulim, method, early_stop)
+            cache.put(key, res)
+        return res
+
+    with profiler.stage("pipeline.design"):
+        Bc, Ac, r_added, zeta, wn, desired_poly = design_controller(num, den, mp, ts, input_type)
+        Bc, Ac = normalize_controller(Bc, Ac)
+    with profiler.stage("pipeline.verify"):
+        actual_poly = closed_loop_poly(num, den, Bc, Ac)
+        is_stable = RouthStability.check(actual_poly)
+
+    with profiler.stage("pipeline.simulate"):
+        dt, t_end, capped = select_time_step(ts, actual_poly)
+        engine = ClosedLoopSimulator(num, den, Bc, Ac, ulim, input_type, method='zoh' if method in ('analytic', 'switched') else method)
+        # 阶跃输入的指标随仿真在线更新 (稳态值偏离参考时退回离线计算)；斜坡输入直接离线计算
+        n_pts = int(np.ceil(t_end / dt))
+        target_val = (n_pts - 1) * dt if input_type == 'ramp' else 1.0
+        analyzer = StreamingPerformanceAnalyzer(target_val, n_pts) if input_type == 'step' else None
+        stop_window = ts if early_stop and input_type == 'step' else None
+        if method == 'rk45':
+            # 连续闭环自适应积分，结果重采样到同一输出网格 (不支持提前终止)
+            t_data, y_data, u_data = engine.run_adaptive(t_end, dt_out=dt)
+            if analyzer is not None: analyzer.update(t_data, y_data)
+        elif method == 'switched':
+            t_data, y_data, u_data = engine.run_switched(dt, t_end, analyzer=analyzer)
+        elif method == 'analytic':
+            # 无饱和时解析求值，饱和时退回 ZOH 逐步仿真
+            t_data, y_data, u_data = engine.run_fast(dt, t_end, analyzer=analyzer, stop_window=stop_window)
+        else:
+            t_data, y_data, u_data = engine.run(dt, t_end, analyzer=analyzer, stop_window=stop_window)
+    with profiler.stage("pipeline.metrics"):
+        if analyzer is not None and analyzer.exact and not engine.stopped_early:
+            metrics = analyzer.get_metrics()
+        else:
+            metrics = PerformanceAnalyzer(t_data, y_data, target_val).get_metrics()
+        add_actuator_metrics(metrics, u_data, ulim)
+
+    return {
+        "Bc": Bc, "Ac": Ac, "r_added": r_added, "zeta": zeta, "wn": wn,
+        "desired_poly": desired_poly, "actual_poly": actual_poly, "stable": is_stable,
+        "dt": dt, "t_end": t_end, "dt_capped": capped, "solver_stats": engine.stats,
+        "stopped_early": engine.stopped_early, "t_stop": engine.t_stop,
+        "t": t_data, "y": y_data, "u": u_data, "target_val": target_val,
+        "metrics": metrics,
+    }
+
+def stream_design(num, den, mp, ts, out_path, input_type='step', ulim=1000.0, reference=None,
+                  dt=None, t_end=None):
+    """
+    长时间仿真的流式流水线：不受 MAX_POINTS 限制，轨迹写入列式文件 out_path 而不留在内存
+    reference: 可选任意参考输入序列 (.npy 路径或数组，采样间隔为 dt)，缺省为 input_type 的阶跃/斜坡
+    dt / t_end: 缺省按 select_time_step 的性能与闭环采样要求 (不放大步长)；给定 reference 时 t_end 缺省为其全长
+    返回与 evaluate_design 相同的设计与指标字段，轨迹以 trace_path / n_points 代替
+    """
+    validate_specs(mp, ts, ulim)
+    with profiler.stage("pipeline.design"):
+        Bc, Ac, r_added, zeta, wn, desired_poly = design_controller(num, den, mp, ts, input_type)
+        Bc, Ac = normalize_controller(Bc, Ac)
+    with profiler.stage("pipeline.verify"):
+        actual_poly = closed_loop_poly(num, den, Bc, Ac)
+        is_stable = RouthStability.check(actual_poly)
+
+    with profiler.stage("pipeline.simulate"):
+        dt_auto, t_auto, _ = select_time_step(ts, actual_poly, max_points=np.inf)
+        dt = dt or dt_auto
+        if reference is not None:
+            reference = load_reference(reference)
+        elif t_end is None:
+            t_end = t_auto
+        engine = ClosedLoopSimulator(num, den, Bc, Ac, ulim, input_type, method='zoh')
+        n_pts = engine.stream_length(dt, t_end, reference)
+        if reference is not None:
+            target_val = float(reference[n_pts - 1]) if n_pts else 0.0
+        else:
+            target_val = (n_pts - 1) * dt if input_type == 'ramp' else 1.0
+        # 指标与执行器统计随仿真逐块累计，不在整条轨迹上分配临时数组
+        analyzer = StreamingPerformanceAnalyzer(target_val, n_pts)
+        actuator = ActuatorStats(ulim)
+        engine.run_stream(dt, out_path, t_end=t_end, reference=reference, analyzer=analyzer,
+                          progress=lambda t, y, u: actuator.update(u))
+    with profiler.stage("pipeline.metrics"):
+        if not n_pts:
+            metrics = {}
+        elif analyzer.exact:
+            metrics = analyzer.get_metrics()
+        else:
+            # 稳态值偏离参考：以实际稳态值为阈值基准，在内存映射上逐块重算 (与离线结果一致)
+            exact = StreamingPerformanceAnalyzer(target_val, n_pts, y_ref=analyzer.y_final)
+            t_data, y_data, _ = open_trace(out_path)
+            for i in range(0, n_pts, engine.STREAM_CHUNK):
+                exact.update(t_data[i:i + engine.STREAM_CHUNK], y_data[i:i + engine.STREAM_CHUNK])
+            del t_data, y_data
+            metrics = exact.get_metrics()
+        actuator.apply(metrics)
+
+    return {
+        "Bc": Bc, "Ac": Ac, "r_added": r_added, "zeta": zeta, "wn": wn,
+        "desired_poly": desired_poly, "actual_poly": actual_poly, "stable": is_stable,
+        "dt": dt, "t_end": n_pts * dt, "trace_path": out_path, "n_points": n_pts,
+        "target_val": target_val, "metrics": metrics,
+    }
+
+class DesignSession:
+    """
+    交互式调参的分阶段缓存：被控对象/输入类型 → 设计 (mp, ts) → 仿真 (ulim)
+    每次 update 只重算受改动影响的阶段：仅限幅值变化时不重新设计，
+    仿真引擎也随设计复用 (ZOH 离散矩阵按 dt 缓存在引擎内)
+    """
+    def __init__(self, max_points=MAX_POINTS, method='zoh'):
+        self.max_points = max_points
+        self.method = method
+        self._plant = None
+        self._design_key = None
+        self._sim_key = None
+        self.design = None
+        self.result = None
+
+    def update(self, num, den, mp, ts, ulim, input_type='step'):
+        """返回与 evaluate_design 相同字段的 dict，另含 redesigned / resimulated 标记"""
+        validate_specs(mp, ts, ulim)
+        plant = (tuple(num), tuple(den), input_type)
+        if plant != self._plant:
+            self._plant, self._design_key, self._sim_key = plant, None, None
+
+        redesigned = (mp, ts) != self._design_key
+        if redesigned:
+            Bc, Ac, r_added, zeta, wn, desired_poly = design_controller(num, den, mp, ts, input_type)
+            Bc, Ac = normalize_controller(Bc, Ac)
+            actual_poly = closed_loop_poly(num, den, Bc, Ac)
+            dt, t_end, capped = select_time_step(ts, actual_poly, self.max_points)
+            self.design = {
+                "Bc": Bc, "Ac": Ac, "r_added": r_added, "zeta": zeta, "wn": wn,
+                "desired_poly": desired_poly, "actual_poly": actual_poly,
+                "stable": RouthStability.check(actual_poly),
+                "dt": dt, "t_end": t_end, "dt_capped": capped,
+                "engine": ClosedLoopSimulator(num, den, Bc, Ac, ulim, input_type, method=self.method),
+            }
+            self._design_key = (mp, ts)
+            self._sim_key = None
+
+        resimulated = ulim != self._sim_key
+        if resimulated:
+            d = self.design
+            engine = d["engine"]
+            engine.ulim = float(ulim)
+            t_data, y_data, u_data = engine.run(d["dt"], d["t_end"])
+            target_val = t_data[-1] if input_type == 'ramp' else 1.0
+            metrics = PerformanceAnalyzer(t_data, y_data, target_val).get_metrics()
+            add_actuator_metrics(metrics, u_data, ulim)
+            self.result = {k: v for k, v in d.items() if k != "engine"}
+            self.result.update(t=t_data, y=y_data, u=u_data, target_val=target_val, metrics=metrics)
+            self._sim_key = ulim
+
+        return dict(self.result, redesigned=redesigned, resimulated=resimulated)
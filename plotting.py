@@ -0,0 +1,123 @@
+import numpy as np
+
+def minmax_decimate(x, y, n_bins, x_range=None):
+    """
+    min/max 降采样：可见区间按点数等分为 n_bins 个桶，每桶保留最小值与最大值两点 (保持先后顺序)
+    峰值、饱和平台等形状在像素级上不丢失；点数不超过 2·n_bins 时原样返回
+    x_range: 可见 x 区间 (x0, x1)，区间外各多保留一个点使曲线延伸到边界
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    i0, i1 = 0, len(x)
+    if x_range is not None and len(x):
+        i0 = max(int(np.searchsorted(x, x_range[0], side='left')) - 1, 0)
+        i1 = min(int(np.searchsorted(x, x_range[1], side='right')) + 1, len(x))
+    n = i1 - i0
+    if n <= 2 * n_bins: return x[i0:i1], y[i0:i1]
+
+    k = -(-n // n_bins)  # 每桶点数 (向上取整)
+    seg = np.pad(y[i0:i1], (0, k * n_bins - n), mode='edge').reshape(n_bins, k)
+    lo = seg.argmin(axis=1)
+    hi = seg.argmax(axis=1)
+    idx = np.sort(np.stack([lo, hi], axis=1), axis=1) + (np.arange(n_bins) * k)[:, None]
+    idx = np.minimum(idx.ravel(), n - 1) + i0
+    return x[idx], y[idx]
+
+class DecimatedLine:
+    """
+    按坐标轴像素宽度降采样显示的曲线
+    完整数据保存在对象中，坐标轴 x 范围变化 (工具栏缩放/平移) 时自动按新范围重新降采样
+    """
+    def __init__(self, ax, x, y, *args, **kwargs):
+        self.ax = ax
+        self.line, = ax.plot([], [], *args, **kwargs)
+        self._cid = ax.callbacks.connect('xlim_changed', lambda _ax: self.refresh())
+        self.set_data(x, y)
+
+    def set_data(self, x, y, autoscale=True):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        if autoscale and len(self.x):
+            finite = self.y[np.isfinite(self.y)]
+            if len(finite):
+                corners = np.array([[self.x[0], finite.min()], [self.x[-1], finite.max()]])
+                self.ax.update_datalim(corners)
+                self.ax.autoscale_view()
+        self.refresh()
+
+    def refresh(self):
+        """按当前可见 x 范围与像素宽度重新降采样"""
+        n_bins = max(int(self.ax.bbox.width), 100)
+        self.line.set_data(*minmax_decimate(self.x, self.y, n_bins, self.ax.get_xlim()))
+
+    def remove(self):
+        self.ax.callbacks.disconnect(self._cid)
+        self.line.remove()
+
+class DecimatedCollection:
+    """
+    多条曲线叠加 (如历史设计对比)：全部放入一个 LineCollection，绘制开销与曲线条数基本无关
+    每条曲线同 DecimatedLine 按可见范围 min/max 降采样，x 范围变化时重新降采样；不扩展坐标范围
+    """
+    def __init__(self, ax, xs, ys, colors=None, **kwargs):
+        from matplotlib.collections import LineCollection
+        self.ax = ax
+        self.xs = [np.asarray(x, dtype=float) for x in xs]
+        self.ys = [np.asarray(y, dtype=float) for y in ys]
+        # 缺省按默认色环 C0..C9 循环着色
+        self.colors = colors if colors is not None else [f"C{i % 10}" for i in range(len(self.xs))]
+        self.collection = LineCollection([], colors=self.colors, **kwargs)
+        ax.add_collection(self.collection, autolim=False)
+        self._cid = ax.callbacks.connect('xlim_changed', lambda _ax: self.refresh())
+        self.refresh()
+
+    def refresh(self):
+        """按当前可见 x 范围与像素宽度重新降采样全部曲线"""
+        n_bins = max(int(self.ax.bbox.width), 100)
+        xlim = self.ax.get_xlim()
+        self.collection.set_segments([np.column_stack(minmax_decimate(x, y, n_bins, xlim))
+                                      for x, y in zip(self.xs, self.ys)])
+
+    def remove(self):
+        self.ax.callbacks.disconnect(self._cid)
+        self.collection.remove()
+
+class BlitManager:
+    """
+    数据曲线的 blit 重绘：整图绘制时缓存背景 (坐标轴、网格、文字)，
+    之后只在背景上重绘 animated 曲线并刷新对应区域，耗时与坐标轴样式无关
+    """
+    def __init__(self, canvas, artists=()):
+        self.canvas = canvas
+        self._bg = None
+        self._artists = []
+        for a in artists: self.add_artist(a)
+        self._cid = canvas.mpl_connect('draw_event', self._on_draw)
+
+    def add_artist(self, art):
+        art.set_animated(True)
+        self._artists.append(art)
+
+    def clear(self):
+        """移除曲线并作废背景缓存 (坐标轴随后会重建)；下一次整图绘制前不做 blit"""
+        for a in self._artists: a.set_animated(False)
+        self._artists = []
+        self._bg = None
+
+    def _on_draw(self, event):
+        self._bg = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        fig = self.canvas.figure
+        for a in self._artists: fig.draw_artist(a)
+
+    def update(self):
+        """只重绘数据曲线；尚无有效背景缓存时退回整图重绘 (由 draw_event 重新缓存背景)"""
+        if self._bg is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._bg)
+        self._draw_animated()
+        self.canvas.blit(self.canvas.figure.bbox)
+        self.canvas.flush_events()
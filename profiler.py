@@ -0,0 +1,124 @@
+"""
+分阶段计时与剖析 (仅依赖标准库)
+    with profiler.stage("仿真"): ...          # 代码段
+    @profiler.profiled("design.sylvester")    # 函数
+关闭时 (默认) stage 返回共享的空上下文、profiled 直接调用原函数，开销仅为一次布尔判断
+开启后记录各阶段耗时、调用次数、(可选) tracemalloc 净分配量，可导出 JSON 或 Chrome trace (chrome://tracing)
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+_NULL = nullcontext()
+
+class _State:
+    enabled = False
+    track_alloc = False
+    alloc_recorded = False  # 当前统计是否含净分配 (disable 后仍保留，供汇总输出)
+    t0 = 0
+    stats = {}     # name -> [count, total_ns, max_ns, alloc_bytes]
+    events = []    # Chrome trace 事件
+    lock = threading.Lock()
+
+_state = _State()
+
+def enable(track_alloc=False):
+    """开启剖析；track_alloc=True 时同时用 tracemalloc 统计各阶段净分配 (会明显变慢)"""
+    reset()
+    _state.track_alloc = _state.alloc_recorded = track_alloc
+    if track_alloc and not tracemalloc.is_tracing(): tracemalloc.start()
+    _state.enabled = True
+
+def disable():
+    _state.enabled = False
+    if _state.track_alloc and tracemalloc.is_tracing(): tracemalloc.stop()
+    _state.track_alloc = False
+
+def is_enabled():
+    return _state.enabled
+
+def reset():
+    with _state.lock:
+        _state.stats = {}
+        _state.events = []
+        _state.t0 = time.perf_counter_ns()
+
+class _Stage:
+    __slots__ = ("name", "start", "mem")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.mem = tracemalloc.get_traced_memory()[0] if _state.track_alloc else 0
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        dur = end - self.start
+        alloc = tracemalloc.get_traced_memory()[0] - self.mem if _state.track_alloc else 0
+        with _state.lock:
+            rec = _state.stats.get(self.name)
+            if rec is None: rec = _state.stats[self.name] = [0, 0, 0, 0]
+            rec[0] += 1
+            rec[1] += dur
+            rec[2] = max(rec[2], dur)
+            rec[3] += alloc
+            _state.events.append({
+                "name": self.name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                "ts": (self.start - _state.t0) / 1000.0, "dur": dur / 1000.0,
+            })
+        return False
+
+def stage(name):
+    """计时上下文；未开启时返回共享空上下文"""
+    return _Stage(name) if _state.enabled else _NULL
+
+def profiled(name=None):
+    """函数计时装饰器；name 缺省为函数的限定名"""
+    def deco(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled: return fn(*args, **kwargs)
+            with _Stage(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def summary():
+    """各阶段统计，按总耗时降序：[{name, calls, total_ms, mean_ms, max_ms, alloc_kb}]"""
+    with _state.lock:
+        items = list(_state.stats.items())
+    rows = [{
+        "name": name, "calls": c, "total_ms": tot / 1e6, "mean_ms": tot / c / 1e6, "max_ms": mx / 1e6,
+        "alloc_kb": alloc / 1024.0 if _state.alloc_recorded else None,
+    } for name, (c, tot, mx, alloc) in items]
+    return sorted(rows, key=lambda r: -r["total_ms"])
+
+def format_summary():
+    """适合写入设计日志的多行文本"""
+    lines = [f"{'阶段':<28} {'次数':>6} {'总计(ms)':>10} {'最大(ms)':>10}"
+             + (f" {'净分配':>10}" if _state.alloc_recorded else "")]
+    for r in summary():
+        line = f"{r['name']:<28} {r['calls']:>6} {r['total_ms']:>10.2f} {r['max_ms']:>10.2f}"
+        if r["alloc_kb"] is not None: line += f" {r['alloc_kb']:>10.1f}KB"
+        lines.append(line)
+    return "\n".join(lines)
+
+def export_json(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"stages": summary()}, f, indent=1, ensure_ascii=False)
+
+def export_chrome_trace(path):
+    """Chrome trace 事件格式 (chrome://tracing 或 Perfetto 打开)"""
+    with _state.lock:
+        events = list(_state.events)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
@@ -0,0 +1,150 @@
+"""
+设计 + 仿真结果缓存 (内容寻址)
+键: 归一化参数 (num, den, mp, ts, input_type, ulim, 仿真方法, 步长策略) 的 SHA-256
+两级存储: 进程内 LRU + 磁盘目录 (每条结果一个压缩 .npz，总大小超限时按最近使用时间淘汰)
+"""
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+# 结果格式或仿真策略变化时递增，旧缓存自动失效
+CACHE_VERSION = 1
+# 压缩保存的轨迹字段
+TRACE_FIELDS = ("t", "y", "u")
+
+def _norm(v):
+    """数值归一化：统一为 12 位有效数字的 float，消除 '10' / '10.0' / 浮点尾差带来的键差异"""
+    return float(f"{float(v):.12g}")
+
+def cache_key(num, den, mp, ts, input_type='step', ulim=1000.0, **policy):
+    """
+    归一化参数的内容哈希
+    policy: 影响结果的其它设置 (仿真方法、点数上限、提前终止等)，按名称排序后参与哈希
+    """
+    payload = {
+        "v": CACHE_VERSION,
+        "num": [_norm(c) for c in num], "den": [_norm(c) for c in den],
+        "mp": _norm(mp), "ts": _norm(ts), "input_type": input_type, "ulim": _norm(ulim),
+        "policy": {k: policy[k] for k in sorted(policy)},
+    }
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _json_default(o):
+    if isinstance(o, np.generic): return o.item()
+    if isinstance(o, np.ndarray): return o.tolist()
+    raise TypeError(f"无法序列化的类型: {type(o).__name__}")
+
+class ResultCache:
+    """
+    两级结果缓存
+    max_items: 内存 LRU 条数；cache_dir: 磁盘目录 (None 表示仅内存)；max_bytes: 磁盘总大小上限
+    """
+    def __init__(self, max_items=128, cache_dir=None, max_bytes=256 * 1024 * 1024):
+        self.max_items = max_items
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._mem = OrderedDict()
+        self.hits = self.misses = 0
+        self._disk_bytes = None  # 磁盘占用估计 (首次写入时扫描)
+        if cache_dir: os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".npz")
+
+    def get(self, key):
+        """命中返回结果 dict (调用方不应修改其中数组)，未命中返回 None"""
+        res = self._mem.get(key)
+        if res is not None:
+            self._mem.move_to_end(key)
+            self.hits += 1
+            return res
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                with np.load(path, allow_pickle=False) as z:
+                    res = json.loads(str(z["meta"]))
+                    for f in TRACE_FIELDS:
+                        if f in z.files: res[f] = z[f]
+                os.utime(path)  # 记录最近使用时间，供磁盘淘汰
+            except (OSError, KeyError, ValueError):
+                res = None
+            if res is not None:
+                self._remember(key, res)
+                self.hits += 1
+                return res
+        self.misses += 1
+        return None
+
+    def put(self, key, result):
+        """写入两级缓存；非轨迹字段需可 JSON 序列化"""
+        self._remember(key, result)
+        if not self.cache_dir: return
+        meta = {k: v for k, v in result.items() if k not in TRACE_FIELDS}
+        arrays = {f: np.asarray(result[f]) for f in TRACE_FIELDS if f in result}
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再原子替换，多进程并发写同一键也不会读到残缺文件
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, meta=np.array(json.dumps(meta, default=_json_default)), **arrays)
+            # 覆盖已有文件时扣除旧文件大小
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp): os.remove(tmp)
+            raise
+        if self._disk_bytes is None: self._disk_bytes = self._scan_disk()[1]
+        else: self._disk_bytes += os.path.getsize(path) - old_size
+        if self._disk_bytes > self.max_bytes: self._evict_disk()
+
+    def _remember(self, key, result):
+        self._mem[key] = result
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def _scan_disk(self):
+        entries = []
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir(): continue
+            for e in os.scandir(sub.path):
+                if e.name.endswith(".npz"):
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+        return entries, sum(size for _, size, _ in entries)
+
+    def _evict_disk(self):
+        """磁盘总大小超过 max_bytes 时，按最近使用时间从旧到新删除 (其它进程写入的文件一并统计)"""
+        entries, total = self._scan_disk()
+        self._disk_bytes = total
+        if total <= self.max_bytes: return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes: break
+        self._disk_bytes = total
+
+    def clear(self):
+        """清空内存层 (磁盘文件保留)"""
+        self._mem.clear()
+
+# 每个进程按目录复用一个结果缓存 (磁盘层在进程间共享)
+_CACHES = {}
+
+def get_cache(cache_dir):
+    """按目录取本进程共享的 ResultCache；cache_dir 为 None 时返回 None"""
+    if cache_dir is None: return None
+    if cache_dir not in _CACHES: _CACHES[cache_dir] = ResultCache(cache_dir=cache_dir)
+    return _CACHES[cache_dir]
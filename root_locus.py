@@ -0,0 +1,119 @@
+"""
+根轨迹：闭环特征多项式 D(s) + K·N(s) 随回路增益 K 的根变化，以及远极点配置参数对闭环极点的影响
+一批参数的特征多项式组成堆叠伴随矩阵，一次 np.linalg.eigvals 求全部根；
+相邻参数间按最近距离匹配根，使各分支连续；分支移动过快的区间自适应加密采样
+"""
+import numpy as np
+from math_core import Polynomial, PolynomialUtils
+from algorithms import get_designer, desired_poles, desired_closed_loop_poles
+
+def batch_roots(coeffs):
+    """
+    一批多项式 (N, m) 升幂系数的全部根 (N, m-1)
+    某行最高次系数为零 (阶次下降) 时，缺失的根记为 inf
+    """
+    C = np.atleast_2d(np.asarray(coeffs, dtype=float))
+    N, m = C.shape
+    n = m - 1
+    R = np.full((N, n), np.inf, dtype=complex)
+    if n == 0: return R
+    lead = C[:, -1]
+    ok = np.abs(lead) > 1e-12 * np.max(np.abs(C), axis=1)
+    if np.any(ok):
+        M = np.zeros((int(ok.sum()), n, n))
+        M[:, np.arange(n - 1), np.arange(1, n)] = 1.0
+        M[:, -1, :] = -C[ok, :n] / lead[ok, None]
+        R[ok] = np.linalg.eigvals(M)
+    # 阶次下降的行：逐行求剩余有限根
+    for i in np.flatnonzero(~ok):
+        r = Polynomial(C[i]).trim().roots()
+        R[i, :len(r)] = r
+    return R
+
+def track_roots(R):
+    """逐行重排根 (N, n)，使每一列为一条连续分支"""
+    R = np.array(R, dtype=complex)
+    for k in range(1, len(R)):
+        R[k] = R[k, _assign(R[k - 1], R[k])]
+    return R
+
+def _assign(prev, cur):
+    """最近距离贪心分配 (行: prev，列: cur)"""
+    n = len(prev)
+    d = np.abs(prev[:, None] - cur[None, :])
+    both_inf = np.isinf(prev)[:, None] & np.isinf(cur)[None, :]
+    d[both_inf] = 0.0
+    d[np.isnan(d)] = np.inf
+    big = np.finfo(float).max
+    d = np.minimum(d, big)  # inf 仍可比较，保证每轮都能选出一对
+    perm = np.empty(n, dtype=int)
+    for _ in range(n):
+        i, j = np.unravel_index(int(np.argmin(d)), d.shape)
+        perm[i] = j
+        d[i, :] = np.inf
+        d[:, j] = np.inf
+    return perm
+
+class RootLocus:
+    """
+    回路增益 K 的根轨迹：特征多项式 D(s) + K·N(s)
+    D = den·ctrl_den, N = num·ctrl_num (升幂)；K = 1 即当前设计的闭环极点
+    """
+    def __init__(self, num, den, ctrl_num=(1.0,), ctrl_den=(1.0,)):
+        N = PolynomialUtils.multiply(list(num), list(ctrl_num))
+        D = PolynomialUtils.multiply(list(den), list(ctrl_den))
+        m = max(len(N), len(D))
+        self.N = np.pad(np.asarray(N, dtype=float), (0, m - len(N)))
+        self.D = np.pad(np.asarray(D, dtype=float), (0, m - len(D)))
+
+    def roots_at(self, gains):
+        """各增益下的闭环根 (len(gains), n)，未做分支匹配"""
+        K = np.asarray(gains, dtype=float)[:, None]
+        return batch_roots(self.D[None, :] + K * self.N[None, :])
+
+    def compute(self, k_min=1e-3, k_max=1e3, n=200, tol=0.02, max_points=5000, max_iter=8):
+        """
+        自适应根轨迹
+        初始为 [k_min, k_max] 上 n 个对数均匀增益 (含 K = 1)；相邻增益间任一分支位移超过
+        tol × 根的整体尺度时在 log K 中点加密，最多 max_iter 轮、max_points 个点
+        返回: gains (升序), roots (len(gains), n_roots)，每列为一条连续分支
+        """
+        gains = np.unique(np.append(np.logspace(np.log10(k_min), np.log10(k_max), n), 1.0))
+        R = self.roots_at(gains)
+        for _ in range(max_iter):
+            R = track_roots(R)
+            finite = np.isfinite(R)
+            scale = np.max(np.abs(R[finite])) if np.any(finite) else 1.0
+            step = np.abs(np.diff(R, axis=0))
+            step[~np.isfinite(step)] = 0.0
+            idx = np.flatnonzero(np.max(step, axis=1) > tol * max(scale, 1e-12))
+            idx = idx[: max(0, max_points - len(gains))]
+            if not len(idx): break
+            mids = np.sqrt(gains[idx] * gains[idx + 1])
+            gains = np.concatenate([gains, mids])
+            R = np.concatenate([R, self.roots_at(mids)])
+            order = np.argsort(gains)
+            gains, R = gains[order], R[order]
+        return gains, track_roots(R)
+
+def far_pole_locus(num, den, mp, ts, input_type='step', far_ratios=None, far_spacing=0.15):
+    """
+    远极点配置的参数轨迹：对每个 far_ratio 重新求解控制器 (复用同一 Sylvester 分解)，
+    返回实际闭环特征多项式 den·Ac + num·Bc 的根
+    返回: far_ratios, roots (len, n_roots)，每列为一条连续分支
+    """
+    far_ratios = np.linspace(3.0, 20.0, 200) if far_ratios is None else np.asarray(far_ratios, dtype=float)
+    designer = get_designer(num, den, input_type)
+    zeta, wn, pole = desired_poles(mp, ts)
+    C = np.array([Polynomial.from_roots(desired_closed_loop_poles(zeta, wn, pole, designer.total_order,
+                                                                  r, far_spacing)).c
+                  for r in far_ratios])
+    A, B = designer.controllers_for(C)
+    # 实际闭环多项式 den·A + num·B (逐行卷积)
+    den_a = np.asarray(designer.den)
+    num_a = np.asarray(designer.num)
+    m = max(len(den_a) + A.shape[1], len(num_a) + B.shape[1]) - 1
+    P = np.zeros((len(far_ratios), m))
+    for k in range(len(den_a)): P[:, k:k + A.shape[1]] += den_a[k] * A
+    for k in range(len(num_a)): P[:, k:k + B.shape[1]] += num_a[k] * B
+    return far_ratios, track_roots(batch_roots(P))
@@ -0,0 +1,208 @@
+"""
+设计结果归档：每次设计一个二进制文件，窗口关闭后仍可重新载入、多次设计叠加对比
+文件布局:
+    [0:8]   魔数 b"SISORUN1"
+    [8:12]  文件头长度 H (uint32，小端)
+    [12:12+H] 文件头 JSON：输入参数、控制器、丢番图验证表、指标，以及轨迹索引 (各段偏移/长度)
+    [12+H:] 轨迹数据段：float32 按字节重排 (shuffle) 后 zlib 压缩
+列表只读文件头，轨迹在首次访问时才解压；等距时间轴只记录 (起点, 步长, 点数)
+同一结果键只归档一次；目录超出条数 / 总大小上限时按修改时间从旧到新删除
+"""
+import json
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+import numpy as np
+from result_cache import _json_default
+
+ARCHIVE_MAGIC = b"SISORUN1"
+ARCHIVE_SUFFIX = ".sra"
+# 格式变化时递增
+ARCHIVE_VERSION = 1
+# 归档的轨迹字段与压缩级别
+TRACE_FIELDS = ("t", "y", "u")
+ZLIB_LEVEL = 6
+# 归档目录的保留上限 (条数 / 总字节数)
+MAX_RUNS = 500
+MAX_BYTES = 256 * 1024 * 1024
+
+_PREFIX = struct.Struct("<8sI")
+
+def _encode(a):
+    """float32 字节重排 + zlib：同一字节位置 (指数/高位尾数) 聚在一起，压缩率明显高于直接压缩"""
+    a = np.ascontiguousarray(a, dtype="<f4")
+    return zlib.compress(a.view(np.uint8).reshape(-1, 4).T.tobytes(), ZLIB_LEVEL)
+
+def _decode(blob, n):
+    raw = np.frombuffer(zlib.decompress(blob), dtype=np.uint8)
+    return raw.reshape(4, n).T.copy().view("<f4").ravel()
+
+def _uniform_grid(t):
+    """等距时间轴返回 (起点, 步长)，否则返回 None"""
+    t = np.asarray(t, dtype=float)
+    if len(t) < 2: return (float(t[0]) if len(t) else 0.0), 0.0
+    start, step = float(t[0]), float(t[1] - t[0])
+    ref = start + step * np.arange(len(t))
+    if np.max(np.abs(t - ref)) <= 1e-9 * max(1.0, abs(float(t[-1]))): return start, step
+    return None
+
+def save_run(path, inputs, result, table=None, key=None):
+    """
+    写入归档文件 (先写临时文件再原子替换)
+    inputs: 设计输入 {num, den, mp, ts, input_type, ulim}
+    result: evaluate_design 形式的结果 dict (t/y/u 作为轨迹，其余可 JSON 序列化的字段进入文件头)
+    table: 丢番图验证表 (pipeline.diophantine_table)
+    key: 可选结果键 (design_cache_key)，供 find_run 去重
+    """
+    header = {
+        "version": ARCHIVE_VERSION, "created": time.time(), "key": key, "inputs": inputs,
+        "result": {k: v for k, v in result.items() if k not in TRACE_FIELDS and k != "metrics"},
+        "metrics": result.get("metrics", {}), "diophantine": table or [],
+        "traces": {},
+    }
+    blobs, offset = [], 0
+    n = len(result["t"]) if "t" in result else 0
+    header["n_points"] = n
+    grid = _uniform_grid(result["t"]) if "t" in result else None
+    if grid is not None: header["t_grid"] = list(grid)
+    for f in TRACE_FIELDS:
+        if f not in result or (f == "t" and grid is not None): continue
+        blob = _encode(result[f])
+        header["traces"][f] = {"offset": offset, "size": len(blob)}
+        blobs.append(blob)
+        offset += len(blob)
+    head = json.dumps(header, default=_json_default, ensure_ascii=False).encode("utf-8")
+
+    d = os.path.dirname(os.path.abspath(path))
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=d)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREFIX.pack(ARCHIVE_MAGIC, len(head)))
+            f.write(head)
+            for blob in blobs: f.write(blob)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp): os.remove(tmp)
+        raise
+    return path
+
+def read_header(path):
+    """只读取文件头 (不读轨迹)；返回 (header dict, 数据段起始偏移)"""
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size: raise ValueError(f"不是有效的归档文件: {path}")
+        magic, size = _PREFIX.unpack(prefix)
+        if magic != ARCHIVE_MAGIC: raise ValueError(f"不是有效的归档文件: {path}")
+        header = json.loads(f.read(size).decode("utf-8"))
+    return header, _PREFIX.size + size
+
+class RunArchive:
+    """已归档的一次设计：构造时只读文件头，t / y / u 在首次访问时加载并缓存"""
+    def __init__(self, path):
+        self.path = path
+        self.header, self._data_start = read_header(path)
+        self._traces = {}
+
+    @property
+    def inputs(self):
+        return self.header["inputs"]
+
+    @property
+    def metrics(self):
+        return self.header["metrics"]
+
+    @property
+    def result(self):
+        return self.header["result"]
+
+    @property
+    def diophantine(self):
+        return self.header["diophantine"]
+
+    @property
+    def created(self):
+        return self.header["created"]
+
+    def trace(self, name):
+        """轨迹字段 (float32；等距时间轴按 float64 重建)"""
+        a = self._traces.get(name)
+        if a is not None: return a
+        n = self.header["n_points"]
+        if name == "t" and "t_grid" in self.header:
+            start, step = self.header["t_grid"]
+            a = start + step * np.arange(n)
+        else:
+            idx = self.header["traces"].get(name)
+            if idx is None: raise KeyError(f"归档中没有轨迹字段: {name}")
+            with open(self.path, "rb") as f:
+                f.seek(self._data_start + idx["offset"])
+                a = _decode(f.read(idx["size"]), n)
+        self._traces[name] = a
+        return a
+
+    @property
+    def t(self):
+        return self.trace("t")
+
+    @property
+    def y(self):
+        return self.trace("y")
+
+    @property
+    def u(self):
+        return self.trace("u")
+
+def run_filename(created=None, tag=""):
+    """按创建时间生成文件名 (同一秒内由 tag 区分)"""
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(created))
+    return f"{stamp}-{tag}{ARCHIVE_SUFFIX}" if tag else stamp + ARCHIVE_SUFFIX
+
+def list_runs(directory):
+    """目录下所有归档 (只读文件头)，按创建时间从新到旧；损坏的文件跳过"""
+    if not directory or not os.path.isdir(directory): return []
+    runs = []
+    for e in os.scandir(directory):
+        if not e.name.endswith(ARCHIVE_SUFFIX): continue
+        try:
+            runs.append(RunArchive(e.path))
+        except (OSError, ValueError, KeyError):
+            continue
+    runs.sort(key=lambda r: -r.created)
+    return runs
+
+def find_run(directory, key):
+    """按结果键查找已有归档 (只读文件名带 key[:8] 标签的文件头)；没有时返回 None"""
+    if not directory or not os.path.isdir(directory): return None
+    suffix = f"-{key[:8]}{ARCHIVE_SUFFIX}"
+    for e in os.scandir(directory):
+        if not e.name.endswith(suffix): continue
+        try:
+            if read_header(e.path)[0].get("key") == key: return e.path
+        except (OSError, ValueError):
+            continue
+    return None
+
+def prune_runs(directory, max_runs=MAX_RUNS, max_bytes=MAX_BYTES):
+    """条数或总大小超限时按修改时间从旧到新删除归档；返回删除的文件数"""
+    if not directory or not os.path.isdir(directory): return 0
+    entries = []
+    for e in os.scandir(directory):
+        if e.name.endswith(ARCHIVE_SUFFIX):
+            st = e.stat()
+            entries.append((st.st_mtime, st.st_size, e.path))
+    count, total = len(entries), sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if count <= max_runs and total <= max_bytes: break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        count -= 1
+        total -= size
+        removed += 1
+    return removed
@@ -1,8 +1,161 @@
+import os
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from math_core import MatrixUtils, Polynomial
+from profiler import profiled
+
+# Dormand–Prince 5(4) 系数 (FSAL)
+_DP_C = (0.0, 1/5, 3/10, 4/5, 8/9, 1.0, 1.0)
+_DP_A = (
+    (),
+    (1/5,),
+    (3/40, 9/40),
+    (44/45, -56/15, 32/9),
+    (19372/6561, -25360/2187, 64448/6561, -212/729),
+    (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+    (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84),
+)
+# 5 阶解与嵌入 4 阶解之差的系数 (局部误差估计)
+_DP_E = (71/57600, 0.0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40)
+
+# dopri45 每个切换点最多缩步重做的次数
+SWITCH_REFINE = 4
+
+def dopri45(f, t0, x0, t1, h, rtol=1e-6, atol=1e-9, mode=None, h_switch=0.0,
+            record=None, max_steps=1_000_000):
+    """
+    Dormand–Prince 自适应积分 x' = f(t, x)，从 t0 积分到 t1
+    h: 初始步长建议值；rtol/atol: 局部误差容限
+    mode: 可选 mode(t, x)，返回分段模式 (如饱和状态)；给定时 f 以 f(t, x, m) 调用，每步内冻结为步首模式
+          步末模式改变时在该步 (光滑的) 三次 Hermite 稠密输出上二分定位切换时刻并缩短该步重做，
+          直到切换点落在步末 h_switch 以内，再以新模式的导数与起步步长重启
+    record: 可选 list，追加每个接受步的 (t, x, dx) 供稠密输出；切换点按左、右导数记录两次
+    返回: x(t1), 下一步建议步长, 接受步数, 拒绝步数 (含定位切换时舍弃的试探步)
+    """
+    if mode is None:
+        g = f
+        f = lambda t, x, m: g(t, x)
+    x = np.array(x0, dtype=float)
+    t = t0
+    m0 = mode(t, x) if mode else None
+    k1 = f(t, x, m0)
+    if record is not None: record.append((t, x.copy(), k1.copy()))
+    n_acc = n_rej = 0
+    k = [None] * 7
+    h_switch = max(h_switch, 4 * np.finfo(float).eps * max(abs(t0), abs(t1)))
+    # 当前切换点已重做的次数 (上限 SWITCH_REFINE，防止插值误差导致来回试探)
+    n_loc = 0
+    while t < t1:
+        if n_acc + n_rej >= max_steps:
+            raise ValueError(f"自适应积分步数超过上限 ({max_steps})，系统可能过于刚性")
+        h = min(h, t1 - t)
+        k[0] = k1
+        for i in range(1, 7):
+            xi = x.copy()
+            for j, aij in enumerate(_DP_A[i]):
+                if aij: xi += (h * aij) * k[j]
+            k[i] = f(t + _DP_C[i] * h, xi, m0)
+        x_new = xi  # 第 7 级的输入即 5 阶解 (FSAL)
+        err_vec = sum((h * e) * kj for e, kj in zip(_DP_E, k) if e)
+        scale = atol + rtol * np.maximum(np.abs(x), np.abs(x_new))
+        err = float(np.max(np.abs(err_vec) / scale)) if len(x) else 0.0
+        if err > 1.0:
+            n_rej += 1
+            h *= max(0.1, 0.9 * err ** -0.2)
+            continue
+
+        t_new = t + h
+        m_new = mode(t_new, x_new) if mode else None
+        if m_new != m0 and h > h_switch and n_loc < SWITCH_REFINE:
+            # 二分切换时刻，保持 mode(a) == m0、mode(b) != m0
+            a, b = t, t_new
+            while b - a > h_switch:
+                c = 0.5 * (a + b)
+                if mode(c, _hermite(t, x, k1, t_new, x_new, k[6], c)) == m0: a = c
+                else: b = c
+            if t_new - b > h_switch:
+                n_rej += 1
+                n_loc += 1
+                h = b - t
+                continue
+
+        t, x, k1 = t_new, x_new, k[6]
+        n_acc += 1
+        n_loc = 0
+        h *= min(5.0, max(0.2, 0.9 * (err if err > 1e-12 else 1e-12) ** -0.2))
+        if m_new != m0 and t < t1:
+            # 越过切换点：先记录左导数，再按新模式重启
+            if record is not None: record.append((t, x.copy(), k1.copy()))
+            m0 = m_new
+            k1 = f(t, x, m0)
+            h = min(h, _start_step(x, k1, atol, rtol))
+        if record is not None: record.append((t, x.copy(), k1.copy()))
+    return x, h, n_acc, n_rej
+
+def _start_step(x, dx, atol, rtol):
+    """起步步长估计 (Hairer 的 0.01·‖x‖/‖x'‖ 准则，按误差容限加权)"""
+    scale = atol + rtol * np.abs(x)
+    d0 = float(np.max(np.abs(x) / scale)) if len(x) else 0.0
+    d1 = float(np.max(np.abs(dx) / scale)) if len(x) else 0.0
+    return 0.01 * d0 / d1 if d0 > 1e-5 and d1 > 1e-5 else 1e-6
+
+def _hermite(t0, x0, d0, t1, x1, d1, t):
+    """单个积分步上的三次 Hermite 插值 (dopri45 切换定位用)"""
+    h = t1 - t0
+    s = (t - t0) / h
+    return ((2*s**3 - 3*s**2 + 1) * x0 + (s**3 - 2*s**2 + s) * h * d0
+            + (-2*s**3 + 3*s**2) * x1 + (s**3 - s**2) * h * d1)
+
+def hermite_resample(record, t_out):
+    """由接受步的 (t, x, dx) 做分段三次 Hermite 插值，得到 t_out 处的状态 (len(t_out), n)"""
+    ts = np.array([r[0] for r in record])
+    X = np.array([r[1] for r in record])
+    dX = np.array([r[2] for r in record])
+    t_out = np.asarray(t_out, dtype=float)
+    if len(ts) == 1: return np.repeat(X, len(t_out), axis=0)
+    i = np.clip(np.searchsorted(ts, t_out, side='right') - 1, 0, len(ts) - 2)
+    h = (ts[i+1] - ts[i])[:, None]
+    s = ((t_out - ts[i])[:, None]) / h
+    h00 = 2*s**3 - 3*s**2 + 1
+    h10 = s**3 - 2*s**2 + s
+    h01 = -2*s**3 + 3*s**2
+    h11 = s**3 - s**2
+    return h00 * X[i] + h10 * h * dX[i] + h01 * X[i+1] + h11 * h * dX[i+1]
+
+# 列式轨迹文件中各行 (每行一列数据，连续存放) 的含义
+TRACE_FIELDS = ('t', 'y', 'u')
+
+def load_reference(src):
+    """参考输入序列：.npy 文件路径 (只读内存映射，不载入内存) 或一维数组"""
+    r = np.load(src, mmap_mode='r') if isinstance(src, (str, os.PathLike)) else np.asarray(src)
+    if r.ndim != 1: raise ValueError("参考输入必须为一维序列")
+    return r
+
+def create_trace(path, n):
+    """新建列式轨迹文件 (.npy，形状 (3, n) 的 float64)，返回可写内存映射"""
+    return np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(len(TRACE_FIELDS), n))
+
+def open_trace(path, mode='r'):
+    """打开轨迹文件，返回 t, y, u 三个内存映射视图 (不复制，可直接交给 PerformanceAnalyzer)"""
+    data = np.load(path, mmap_mode=mode)
+    if data.ndim != 2 or data.shape[0] != len(TRACE_FIELDS):
+        raise ValueError(f"不是有效的轨迹文件: {path}")
+    return data[0], data[1], data[2]
 
 class CustomSimulator:
-    """通用 SISO 线性系统仿真器"""
-    def __init__(self, num: list, den: list):
+    """
+    通用 SISO 线性系统仿真器
+    method: 'rk4'  -> 逐步 RK4 积分 (利用伴随型结构，单步 O(n))
+            'zoh'  -> 零阶保持精确离散化 (Φ = e^{A·dt}, Γ = ∫e^{Aτ}dτ·B，按 dt 缓存)
+            'rk45' -> 每个采样区间内 Dormand–Prince 自适应子步 (局部误差受 rtol/atol 控制)
+    """
+    METHODS = ('rk4', 'zoh', 'rk45')
+    # rk45 模式的误差容限
+    RTOL, ATOL = 1e-6, 1e-9
+
+    def __init__(self, num: list, den: list, method: str = 'rk4'):
+        if method not in self.METHODS:
+             raise ValueError(f"未知的仿真方法: {method}")
         if len(num) > len(den):
              raise ValueError(f"物理不可实现：分子阶次({len(num)-1})高于分母阶次({len(den)-1})")
         scale = den[-1]
@@ -29,73 +182,889 @@ class CustomSimulator:
         for i in range(self.n):
             self.C[0, i] = self.num[i] - self.den[i] * self.D
         
-        self.state = np.zeros((self.n, 1))
+        # 扩展缓冲区 z = [x; s1..s4] (状态 + 4 个标量槽位)
+        #   rk4: 伴随型下 A^j·f 只是 x 的平移并在末尾追加一个标量，
+        #        第 j 个长度为 n 的滑动窗口即 A^(j-1)·f，整步更新为 O(n)
+        #   zoh: z[:n+1] = [x; u]，一次矩阵-向量乘即完成 x ← Φx + Γu
+        self._z = np.zeros(self.n + 4)
+        self.state = self._z[:self.n].reshape(self.n, 1)
+        # 一维视图 (与 state 共享内存)，供闭环引擎的快速路径使用
+        self._x = self._z[:self.n]
+        self._c = self.C[0]
+        self._b = self.B[:, 0]
+        self._a = np.array(self.den[:-1])
+        self._win = sliding_window_view(self._z, max(self.n, 1))
+        self._rows = [self._win[j] for j in range(4)]
+        self._buf = np.empty(self.n)
+        self._rk4_dt = None
+
+        self.method = method
+        self._zoh_cache = {}
+        self._rk45_h = None
+        self._step = {'rk4': self._rk4_step, 'zoh': self._zoh_step, 'rk45': self._rk45_step}[method]
+
+    def reset(self):
+        self.state[:] = 0.0
 
     def compute_output(self, u_in):
-        u = float(u_in)
-        return float(self.C @ self.state + self.D * u)
+        return float(self._output(float(u_in)))
 
     def update_state(self, u_in, dt):
-        u = float(u_in)
-        def dyn(x): return self.A @ x + self.B * u
         if self.n > 0:
-            k1 = dyn(self.state)
-            k2 = dyn(self.state + 0.5*dt*k1)
-            k3 = dyn(self.state + 0.5*dt*k2)
-            k4 = dyn(self.state + dt*k3)
-            self.state += (dt/6) * (k1 + 2*k2 + 2*k3 + k4)
+            self._step(float(u_in), dt)
+
+    def discretize(self, dt):
+        """
+        零阶保持离散化 (结果按 dt 缓存)
+        返回: Phi (n×n), Gamma (n,)
+        """
+        PG = self._zoh_matrix(dt)
+        return PG[:, :self.n], PG[:, self.n]
+
+    def _zoh_matrix(self, dt):
+        PG = self._zoh_cache.get(dt)
+        if PG is None:
+            # expm([[A, B], [0, 0]]·dt) = [[Φ, Γ], [0, 1]]
+            M = np.zeros((self.n + 1, self.n + 1))
+            M[:self.n, :self.n] = self.A
+            M[:self.n, self.n] = self._b
+            PG = np.ascontiguousarray(MatrixUtils.expm(M * dt)[:self.n, :])
+            self._zoh_cache[dt] = PG
+        return PG
+
+    def _zoh_step(self, u, dt):
+        """ZOH 精确离散单步: x ← [Φ Γ]·[x; u]"""
+        z, n = self._z, self.n
+        z[n] = u
+        z[:n] = self._zoh_matrix(dt).dot(z[:n+1])
+
+    def _rk4_step(self, u, dt):
+        """
+        伴随型 RK4 单步 (O(n)，无逐步临时数组)
+        线性定常系统下 RK4 等价于 x + Σ_{j=1..4} dt^j/j! · A^(j-1)·f，f = Ax + Bu
+        """
+        if dt != self._rk4_dt:
+            self._rk4_coef = np.array([1.0, dt, dt**2 / 2, dt**3 / 6, dt**4 / 24])
+            self._rk4_dt = dt
+        z, a, rows, n = self._z, self._a, self._rows, self.n
+        z[n] = u - a.dot(rows[0])
+        z[n+1] = -a.dot(rows[1])
+        z[n+2] = -a.dot(rows[2])
+        z[n+3] = -a.dot(rows[3])
+        np.dot(self._rk4_coef, self._win, out=self._buf)
+        z[:n] = self._buf
+
+    def _rk45_step(self, u, dt):
+        """输入保持 u 不变，在 [0, dt] 内自适应积分；子步长跨调用沿用"""
+        h = self._rk45_h or dt
+        x, self._rk45_h, _, _ = dopri45(lambda t, x: self._deriv(x, u), 0.0, self._x, dt, h,
+                                        self.RTOL, self.ATOL)
+        self._x[:] = x
+
+    def _deriv(self, x, u):
+        """伴随型状态导数 Ax + Bu (O(n))"""
+        dx = np.empty_like(x)
+        if self.n == 0: return dx
+        dx[:-1] = x[1:]
+        dx[-1] = u - self._a.dot(x)
+        return dx
+
+    def _output(self, u):
+        """compute_output 的无类型转换版本 (u 须为 float)"""
+        return self._c.dot(self._x) + self.D * u
+
+    def _deriv_norm(self, u):
+        """状态导数的无穷范数 ||Ax + Bu||∞ (伴随型下为 O(n))"""
+        n, x = self.n, self._x
+        if n == 0: return 0.0
+        top = float(np.max(np.abs(x[1:]))) if n > 1 else 0.0
+        return max(top, abs(u - self._a.dot(x)))
+
+class ClosedLoopSimulator:
+    """
+    闭环时域仿真引擎 (不依赖 GUI)
+    结构: r -> e -> 控制器 C(s) -> 执行器限幅 -> 被控对象 G(s) -> y
+    含 Clamping 抗饱和：执行器饱和且误差继续推向饱和方向时冻结控制器状态
+    """
+    def __init__(self, plant_num, plant_den, ctrl_num, ctrl_den, ulim, input_type='step', method='rk4'):
+        if ulim <= 0: raise ValueError("控制量限幅值必须为正数")
+        if input_type not in ('step', 'ramp'): raise ValueError(f"未知的输入类型: {input_type}")
+        self.plant = CustomSimulator(plant_num, plant_den, method)
+        self.ctrl = CustomSimulator(ctrl_num, ctrl_den, method)
+        self.ulim = float(ulim)
+        self.input_type = input_type
+        # 最近一次 run 的结束信息
+        self.stopped_early = False
+        self.t_stop = None
+        self.cancelled = False
+        self.analytic = False
+        self.stats = None
+
+    def reference(self, t):
+        """参考输入 r(t)，支持数组"""
+        t = np.asarray(t, dtype=float)
+        return t.copy() if self.input_type == 'ramp' else np.ones_like(t)
+
+    # 在线分析器的喂数据间隔 (步)
+    ANALYZER_CHUNK = 1024
+
+    @profiled("sim.run")
+    def run(self, dt, t_end, analyzer=None, stop_window=None, stop_tol=1e-4, progress=None):
+        """
+        从零初始状态仿真到 t_end，结果写入预分配数组
+        analyzer: 可选 StreamingPerformanceAnalyzer，仿真过程中分块更新指标
+        progress: 可选回调 progress(t, y, u)，每 ANALYZER_CHUNK 步传入新完成的一段轨迹 (视图)；
+                  返回 True 时取消仿真 (self.cancelled 置位，结果截断到已完成部分)
+        stop_window: 提前终止窗口 (s)。输出误差 (相对参考幅值) 与对象/控制器状态导数
+                     连续 stop_window 秒均不超过 stop_tol 时判定已稳定并结束仿真；None 表示不启用
+        返回: t, y, u (均为长度相同的 np.ndarray；提前终止时为截断后的视图)
+              结束时刻记录在 self.t_stop，是否提前终止记录在 self.stopped_early
+        """
+        if dt <= 0: raise ValueError("仿真步长 dt 必须为正数")
+        t_data = np.arange(0, t_end, dt)
+        n_pts = len(t_data)
+        y_data = np.empty(n_pts)
+        u_data = np.empty(n_pts)
+        r_data = self.reference(t_data)
+
+        self.plant.reset()
+        self.ctrl.reset()
+        y_curr = self.plant._output(0.0)
+        chunk = self.ANALYZER_CHUNK
+        # 提前终止状态 [stop_tol, stop_steps, quiet]，quiet 在块间累计
+        settle = [stop_tol, int(np.ceil(stop_window / dt)), 0] if stop_window else None
+        n_done = 0
+        self.cancelled = False
+
+        while n_done < n_pts:
+            i, j = n_done, min(n_done + chunk, n_pts)
+            y_curr, m = self._step_block(r_data[i:j], y_data[i:j], u_data[i:j], y_curr, dt, settle)
+            n_done = i + m
+            seg = slice(i, n_done)
+            if analyzer is not None: analyzer.update(t_data[seg], y_data[seg])
+            if progress is not None and progress(t_data[seg], y_data[seg], u_data[seg]):
+                self.cancelled = True
+                break
+            if m < j - i: break
+
+        self.stopped_early = n_done < n_pts and not self.cancelled
+        self.t_stop = float(t_data[n_done - 1]) if n_done else 0.0
+        return t_data[:n_done], y_data[:n_done], u_data[:n_done]
+
+    # 流式仿真每块的步数 (决定常驻内存)
+    STREAM_CHUNK = 65536
+
+    @staticmethod
+    def stream_length(dt, t_end=None, reference=None):
+        """run_stream 的仿真点数 (同时校验 t_end 与参考输入序列长度)"""
+        if dt <= 0: raise ValueError("仿真步长 dt 必须为正数")
+        if t_end is None:
+            if reference is None: raise ValueError("未给定参考输入序列时必须指定仿真时长 t_end")
+            return len(reference)
+        n_pts = int(np.ceil(t_end / dt))
+        if reference is not None and n_pts > len(reference):
+            raise ValueError(f"参考输入序列长度 ({len(reference)}) 不足 {n_pts} 点")
+        return n_pts
+
+    @profiled("sim.run_stream")
+    def run_stream(self, dt, out_path, t_end=None, reference=None, analyzer=None, chunk=None, progress=None):
+        """
+        流式 (外存) 仿真：逐块推进，t/y/u 逐块写入列式轨迹文件 out_path (.npy 内存映射)，
+        常驻内存只有一块缓冲区，与仿真长度无关；结果用 open_trace(out_path) 重新打开
+        reference: 可选的任意参考输入序列 (见 load_reference)，第 k 个值对应 t = k·dt；
+                   缺省时按 input_type 取阶跃/斜坡
+        t_end: 仿真时长；给定 reference 时缺省为其全长，且不得超过其全长
+        analyzer: 可选 StreamingPerformanceAnalyzer，逐块更新
+        progress: 可选回调 progress(t, y, u)，每块传入刚完成的一段 (块缓冲区视图，调用后即被覆盖)；
+                  返回 True 时取消仿真 (self.cancelled 置位，文件中其后部分不再写入)
+        返回: 已仿真的点数
+        """
+        ref = None if reference is None else load_reference(reference)
+        n_pts = self.stream_length(dt, t_end, ref)
+        chunk = chunk or self.STREAM_CHUNK
+        out = create_trace(out_path, n_pts)
+        y_buf, u_buf = np.empty(chunk), np.empty(chunk)
+
+        self.plant.reset()
+        self.ctrl.reset()
+        y_curr = self.plant._output(0.0)
+        n_done = 0
+        self.cancelled = False
+        try:
+            for i in range(0, n_pts, chunk):
+                j = min(i + chunk, n_pts)
+                t_seg = np.arange(i, j) * dt
+                r_seg = self.reference(t_seg) if ref is None else np.asarray(ref[i:j], dtype=float)
+                y_curr, _ = self._step_block(r_seg, y_buf, u_buf, y_curr, dt)
+                y_seg, u_seg = y_buf[:j - i], u_buf[:j - i]
+                out[0, i:j] = t_seg
+                out[1, i:j] = y_seg
+                out[2, i:j] = u_seg
+                n_done = j
+                if analyzer is not None: analyzer.update(t_seg, y_seg)
+                if progress is not None and progress(t_seg, y_seg, u_seg):
+                    self.cancelled = True
+                    break
+            out.flush()
+        finally:
+            del out
+        self.stopped_early = False
+        self.t_stop = (n_done - 1) * dt if n_done else 0.0
+        return n_done
+
+    def _step_block(self, r, y_out, u_out, y_curr, dt, settle=None):
+        """
+        按参考序列 r 推进 len(r) 步 (执行器限幅 + Clamping 抗饱和)，输出写入 y_out/u_out
+        settle: 可选提前终止状态 [stop_tol, stop_steps, quiet] (quiet 原地更新)，
+                判定稳定时在当前步返回，不再推进状态
+        返回: (下一步的 y, 本块完成的步数)
+        """
+        plant, ctrl, ulim = self.plant, self.ctrl, self.ulim
+        for k in range(len(r)):
+            error = r[k] - y_curr
+            u_raw = ctrl._output(error)
+            if u_raw > ulim:
+                u_act = ulim
+                should_update = error <= 0
+            elif u_raw < -ulim:
+                u_act = -ulim
+                should_update = error >= 0
+            else:
+                u_act = u_raw
+                should_update = True
+            y_out[k] = y_curr
+            u_out[k] = u_act
+            # 提前终止判据：先用标量误差过滤，通过后才计算状态导数
+            if settle is not None:
+                tol = settle[0]
+                if abs(error) <= tol * max(1.0, abs(r[k])) \
+                        and plant._deriv_norm(u_act) <= tol and ctrl._deriv_norm(error) <= tol:
+                    settle[2] += 1
+                    if settle[2] >= settle[1]: return y_curr, k + 1
+                else:
+                    settle[2] = 0
+            if should_update and ctrl.n > 0:
+                ctrl._step(error, dt)
+            if plant.n > 0:
+                plant._step(u_act, dt)
+            y_curr = plant._output(u_act)
+        return y_curr, len(r)
+
+    def run_fast(self, dt, t_end, analyzer=None, **run_kwargs):
+        """
+        先尝试解析 (模态) 响应：闭环极点互异且全程 |u| ≤ ulim 时直接返回，O(点数) 向量化；
+        否则 (执行器饱和 / 重极点) 退回逐步仿真 run(dt, t_end, analyzer, **run_kwargs)
+        是否采用解析解记录在 self.analytic
+        注意解析解对应连续时间闭环 (与 run_adaptive 一致)，与采样保持的逐步仿真相差 O(dt)
+        """
+        if dt <= 0: raise ValueError("仿真步长 dt 必须为正数")
+        modal = ModalResponse(self.plant.num, self.plant.den, self.ctrl.num, self.ctrl.den, self.input_type)
+        if modal.ok:
+            t_data = np.arange(0, t_end, dt)
+            y_data, u_data = modal.evaluate(t_data)
+            if np.all(np.isfinite(u_data)) and np.max(np.abs(u_data), initial=0.0) <= self.ulim:
+                self.analytic = True
+                self.stopped_early = self.cancelled = False
+                self.t_stop = float(t_data[-1]) if len(t_data) else 0.0
+                if analyzer is not None: analyzer.update(t_data, y_data)
+                return t_data, y_data, u_data
+        self.analytic = False
+        return self.run(dt, t_end, analyzer=analyzer, **run_kwargs)
+
+    def _loop_signals(self, t, z, m=None):
+        """
+        连续闭环在 (t, z=[xp; xc]) 处的 (u_act, e, 控制器是否更新)；含直通项代数环求解
+        m: 可选的冻结模式 (饱和方向, 是否更新)，给定时按该模式计算而不重新判定
+        """
+        plant, ctrl = self.plant, self.ctrl
+        xp, xc = z[:plant.n], z[plant.n:]
+        r = t if self.input_type == 'ramp' else 1.0
+        # u = Cc·xc + Dc·(r - Cp·xp - Dp·u)
+        u_raw = (ctrl._c.dot(xc) + ctrl.D * (r - plant._c.dot(xp))) / (1.0 + ctrl.D * plant.D)
+        if m is not None:
+            u_act = m[0] * self.ulim if m[0] else u_raw
+            return u_act, r - plant._c.dot(xp) - plant.D * u_act, m[1]
+        u_act = min(max(u_raw, -self.ulim), self.ulim)
+        e = r - plant._c.dot(xp) - plant.D * u_act
+        update = not ((u_raw > self.ulim and e > 0) or (u_raw < -self.ulim and e < 0))
+        return u_act, e, update
+
+    @profiled("sim.run_switched")
+    def run_switched(self, dt, t_end, analyzer=None, max_switches=10000):
+        """
+        连续闭环的分段线性精确仿真 (见 SwitchedLinearLoop)：各饱和/抗饱和模式的增广矩阵指数只算一次，
+        线性段整段倍增推进，只在模式切换处寻根；以线性段为主的长仿真开销接近 O(切换次数)
+        与 run_adaptive 为同一连续模型 (无采样保持延迟)，结果只含矩阵指数的舍入误差
+        返回: t, y, u；统计记录在 self.stats (n_switches, n_segments)
+        """
+        if dt <= 0: raise ValueError("仿真步长 dt 必须为正数")
+        t_data = np.arange(0, t_end, dt)
+        loop = SwitchedLinearLoop(self.plant, self.ctrl, self.ulim, self.input_type)
+        W, n_sw, n_seg = loop.simulate(t_data, max_switches)
+        y_data, u_data = loop.signals(W)
+        if analyzer is not None: analyzer.update(t_data, y_data)
+        self.stats = {"n_switches": n_sw, "n_segments": n_seg}
+        self.stopped_early = self.cancelled = False
+        self.t_stop = float(t_data[-1]) if len(t_data) else 0.0
+        return t_data, y_data, u_data
+
+    @profiled("sim.run_adaptive")
+    def run_adaptive(self, t_end, t_out=None, dt_out=None, rtol=1e-6, atol=1e-9, h0=None,
+                     max_steps=1_000_000):
+        """
+        连续闭环的 Dormand–Prince 自适应仿真 (控制器与对象联合积分，无采样保持延迟)
+        每步内冻结饱和/抗饱和模式，模式切换时由稠密输出定位切换时刻，积分恰好越过切换点后重启
+        输出: 接受步结果经三次 Hermite 插值重采样到 t_out (默认 np.arange(0, t_end, dt_out))
+        返回: t, y, u；积分统计记录在 self.stats (n_steps, n_rejected)
+        """
+        if t_out is None:
+            if not dt_out or dt_out <= 0: raise ValueError("需要给定输出时间网格 t_out 或正的 dt_out")
+            t_out = np.arange(0, t_end, dt_out)
+        t_out = np.asarray(t_out, dtype=float)
+        plant, ctrl = self.plant, self.ctrl
+        plant.reset()
+        ctrl.reset()
+        npl = plant.n
+
+        def f(t, z, m):
+            u_act, e, update = self._loop_signals(t, z, m)
+            dz = np.empty_like(z)
+            dz[:npl] = plant._deriv(z[:npl], u_act)
+            dz[npl:] = ctrl._deriv(z[npl:], e) if update else 0.0
+            return dz
+
+        def mode(t, z):
+            u_act, _, update = self._loop_signals(t, z)
+            return int(u_act >= self.ulim) - int(u_act <= -self.ulim), update
+
+        # 切换时刻的定位精度
+        h_switch = max(t_end * 1e-9, 1e-12)
+        record = []
+        _, _, n_acc, n_rej = dopri45(f, 0.0, np.zeros(npl + ctrl.n), t_end, h0 or t_end / 100.0,
+                                     rtol, atol, mode, h_switch, record, max_steps)
+        Z = hermite_resample(record, t_out)
+        # 输出网格上的 u, y (与 _loop_signals 相同的代数关系，按列向量化)
+        yp = Z[:, :npl].dot(plant._c)
+        u_raw = (Z[:, npl:].dot(ctrl._c) + ctrl.D * (self.reference(t_out) - yp)) / (1.0 + ctrl.D * plant.D)
+        u_data = np.clip(u_raw, -self.ulim, self.ulim)
+        y_data = yp + plant.D * u_data
+        self.stats = {"n_steps": n_acc, "n_rejected": n_rej}
+        self.stopped_early = False
+        self.t_stop = float(t_out[-1]) if len(t_out) else 0.0
+        return t_out, y_data, u_data
+
+class ModalResponse:
+    """
+    无饱和闭环的解析响应 (部分分式 / 留数展开，无需逐步积分)
+    Y(s) = Gc·Gp/(1+Gc·Gp)·R(s)，U(s) = Gc/(1+Gc·Gp)·R(s)，R(s) = 1/s (阶跃) 或 1/s² (斜坡)
+    闭环极点 p_i 互异且不含原点时：y(t) = Σ r_i·e^{p_i t} + 原点处的多项式项 (+ 直通项·r(t))
+    条件不满足 (重极点 / 原点极点) 时 self.ok = False，由调用方退回逐步仿真
+    """
+    # 极点相对间距低于此值视为重极点 (留数病态)
+    SEP_TOL = 1e-6
+
+    def __init__(self, plant_num, plant_den, ctrl_num, ctrl_den, input_type='step'):
+        Np, Dp = Polynomial(plant_num), Polynomial(plant_den)
+        Nc, Dc = Polynomial(ctrl_num), Polynomial(ctrl_den)
+        self.k = 2 if input_type == 'ramp' else 1
+        self.A = (Dp * Dc + Np * Nc).trim(0.0)
+        self.poles = self.A.roots()
+        Ny, Nu = (Np * Nc).trim(0.0), (Dp * Nc).trim(0.0)
+        self.ok = max(Ny.degree, Nu.degree) <= self.A.degree and self._well_posed()
+        if self.ok:
+            self.y_terms = self._expand(Ny)
+            self.u_terms = self._expand(Nu)
+
+    def _well_posed(self):
+        p = self.poles
+        if abs(self.A.c[0]) < 1e-12 * np.max(np.abs(self.A.c)): return False
+        if len(p) < 2: return True
+        d = np.abs(p[:, None] - p[None, :]) + np.diag(np.full(len(p), np.inf))
+        return bool(np.min(d) > self.SEP_TOL * max(1.0, np.max(np.abs(p))))
+
+    def _expand(self, N):
+        """N(s)/(A(s)·s^k) 的展开：(直通系数 q, 留数 r_i, 原点多项式项系数 [常数, t])"""
+        A, k = self.A, self.k
+        n = A.degree
+        q = 0.0
+        if N.degree == n:
+            # 双正则 (分子分母同阶)：先分离直通项，余式严格真
+            q = N.c[n] / A.c[n]
+            N = Polynomial((N - A * q).c[:max(n, 1)])
+        p = self.poles
+        dA = A.derivative()
+        r = N(p) / (dA(p) * p ** k)
+        # 原点处 k 重极点：F(s) = N/A 在 0 处的泰勒系数
+        A0, A1 = A.c[0], (A.c[1] if len(A.c) > 1 else 0.0)
+        N0, N1 = N.c[0], (N.c[1] if len(N.c) > 1 else 0.0)
+        f0 = N0 / A0
+        if k == 1:
+            poly = (f0, 0.0)
+        else:
+            f1 = (N1 * A0 - N0 * A1) / A0 ** 2
+            poly = (f1, f0)  # L^{-1}[f0/s² + f1/s] = f1 + f0·t
+        return q, r, poly
+
+    def evaluate(self, t, chunk=65536):
+        """t 处的 y(t), u(t)；按 chunk 分块限制 e^{p t} 中间矩阵的内存"""
+        t = np.asarray(t, dtype=float)
+        ref = t if self.k == 2 else np.ones_like(t)
+        out = []
+        for q, r, (c0, c1) in (self.y_terms, self.u_terms):
+            v = np.empty(len(t))
+            for i in range(0, len(t), chunk):
+                tc = t[i:i + chunk]
+                v[i:i + chunk] = (np.exp(np.outer(tc, self.poles)) @ r).real
+            v += c0 + c1 * t + q * ref
+            out.append(v)
+        return out[0], out[1]
+
+class SwitchedLinearLoop:
+    """
+    含限幅 / Clamping 抗饱和的连续闭环的分段线性 (仿射) 描述
+    增广状态 w = [xp; xc; t; 1]，每种模式下 w' = M·w 为线性定常系统：
+        模式 = (饱和方向 s ∈ {-1, 0, +1}, 控制器是否积分)；s ≠ 0 时 u = s·ulim，控制器在误差继续
+        推向饱和方向时冻结 (与 ClosedLoopSimulator._loop_signals 一致)
+    同一模式内用 e^{M·dt} 的 2^j 次幂倍增推进整段输出网格；模式切换点在网格区间内由
+    寻根 (Illinois 试位法) 定位，切换后换用新模式的矩阵指数继续推进
+    注意：只在输出网格点上检测模式，完全落在一个网格区间内的短暂切换 (离开后又返回) 不会被发现
+    """
+    # 切换时刻的定位精度 (相对所在网格区间长度) 与单次寻根的迭代上限
+    SWITCH_TOL = 1e-12
+    ROOT_ITERS = 100
+    # 无切换时推进块长从 MIN_CHUNK 起倍增，至多 MAX_CHUNK 点
+    MIN_CHUNK, MAX_CHUNK = 16, 65536
+    # 已饱和时退出饱和的滞环宽度 (相对 ulim)：控制器冻结且无直通时 u_raw 恰停在限幅边界上，
+    # 无滞环会因舍入误差在饱和/线性之间反复切换
+    SAT_HYST = 1e-9
+
+    def __init__(self, plant, ctrl, ulim, input_type='step'):
+        npl, nc = plant.n, ctrl.n
+        self.npl, self.nc = npl, nc
+        self.N = N = npl + nc + 2
+        self.ulim = float(ulim)
+        self._plant, self._ctrl = plant, ctrl
+        it, i1 = N - 2, N - 1
+        rvec = np.zeros(N)
+        rvec[it if input_type == 'ramp' else i1] = 1.0
+        cp = np.zeros(N)
+        cp[:npl] = plant._c
+        cc = np.zeros(N)
+        cc[npl:npl + nc] = ctrl._c
+        self._dp = plant.D
+        # u_raw = ku·w (含直通项代数环)；误差 e = ke·w - Dp·u_act
+        self.ku = (cc + ctrl.D * (rvec - cp)) / (1.0 + ctrl.D * plant.D)
+        self.ke = rvec - cp
+        self.cy = cp
+        self._M = {}
+        self._powers = {}
+
+    # --- 模式 ---
+
+    @staticmethod
+    def decode(m):
+        """模式编号 → (s, 控制器是否积分)"""
+        return m // 2 - 1, bool(m % 2)
+
+    def classify(self, W, m=None):
+        """各行状态 (K, N) 所处的模式编号 (K,)；m 为当前模式 (给定时对退出饱和施加滞环)"""
+        W = np.atleast_2d(W)
+        u = W @ self.ku
+        s0 = 0 if m is None else self.decode(m)[0]
+        hi = self.ulim * (1.0 - self.SAT_HYST) if s0 == 1 else self.ulim
+        lo = self.ulim * (1.0 - self.SAT_HYST) if s0 == -1 else self.ulim
+        s = (u >= hi).astype(int) - (u <= -lo).astype(int)
+        e = W @ self.ke - self._dp * np.clip(u, -self.ulim, self.ulim)
+        frozen = ((s == 1) & (e > 0)) | ((s == -1) & (e < 0))
+        return 2 * (s + 1) + (~frozen).astype(int)
+
+    def guard(self, m, w):
+        """模式 m 的守卫函数：模式内 ≥ 0，越出模式后 < 0 (各约束取最小)"""
+        s, active = self.decode(m)
+        u = w @ self.ku
+        if s == 0: return min(self.ulim - u, u + self.ulim)
+        e = w @ self.ke - self._dp * s * self.ulim
+        return min(s * u - self.ulim * (1.0 - self.SAT_HYST), -s * e if active else s * e)
+
+    def matrix(self, m):
+        """模式 m 下的增广系统矩阵 M (w' = M·w)"""
+        M = self._M.get(m)
+        if M is None:
+            s, active = self.decode(m)
+            plant, ctrl, npl, nc = self._plant, self._ctrl, self.npl, self.nc
+            ka = self.ku if s == 0 else np.eye(self.N)[-1] * (s * self.ulim)
+            M = np.zeros((self.N, self.N))
+            M[:npl, :npl] = plant.A
+            M[:npl] += np.outer(plant._b, ka)
+            if active:
+                M[npl:npl + nc, npl:npl + nc] = ctrl.A
+                M[npl:npl + nc] += np.outer(ctrl._b, self.ke - self._dp * ka)
+            M[-2, -1] = 1.0
+            self._M[m] = M
+        return M
+
+    def transition(self, m, h):
+        """e^{M·h}"""
+        return MatrixUtils.expm(self.matrix(m) * h)
+
+    def _power(self, m, dt, j):
+        """(e^{M·dt})^(2^j) 的转置 (行向量右乘用)，按 (模式, dt) 缓存"""
+        pw = self._powers.setdefault((m, dt), [])
+        if not pw: pw.append(self.transition(m, dt).T.copy())
+        while len(pw) <= j: pw.append(pw[-1] @ pw[-1])
+        return pw[j]
+
+    def propagate(self, m, w, dt, L):
+        """模式 m 内从 w 起推进 L 个网格步 (倍增法)，返回 (L, N)"""
+        X = w[None, :]
+        j = 0
+        while len(X) < L + 1:
+            X = np.vstack([X, X @ self._power(m, dt, j)])
+            j += 1
+        return X[1:L + 1]
+
+    # --- 切换 ---
+
+    def _locate(self, m, w, h):
+        """
+        已知 w 处于模式 m、e^{M h}·w 已不在模式 m：Illinois 试位法 + 模式判定维护区间，
+        返回 (切换时刻偏移, 刚越过切换点的状态)
+        """
+        a, b = 0.0, h
+        ga, gb = self.guard(m, w), self.guard(m, self.transition(m, h) @ w)
+        wb = None
+        side = 0
+        tol = self.SWITCH_TOL * h
+        for _ in range(self.ROOT_ITERS):
+            if b - a <= tol: break
+            c = (a * gb - b * ga) / (gb - ga) if ga > 0 > gb else 0.5 * (a + b)
+            if not a < c < b: c = 0.5 * (a + b)
+            wc = self.transition(m, c) @ w
+            gc = self.guard(m, wc)
+            if self.classify(wc, m)[0] == m:
+                a, ga = c, max(gc, 0.0)
+                if side == 1: gb *= 0.5
+                side = 1
+            else:
+                b, gb, wb = c, min(gc, 0.0), wc
+                if side == -1: ga *= 0.5
+                side = -1
+        if wb is None: wb = self.transition(m, b) @ w
+        return b, wb
+
+    def advance(self, m, w, h, max_switches):
+        """从模式 m 的 w 推进 h (区间内可能多次切换)，返回 (终点状态, 终点模式, 切换次数)"""
+        n = 0
+        while True:
+            wb = self.transition(m, h) @ w
+            if self.classify(wb, m)[0] == m: return wb, m, n
+            s, w = self._locate(m, w, h)
+            h -= s
+            m = int(self.classify(w)[0])
+            n += 1
+            if n > max_switches:
+                raise ValueError(f"模式切换次数超过上限 ({max_switches})，可能存在抖振")
+
+    def simulate(self, t_data, max_switches=10000):
+        """
+        零初始状态下在等距网格 t_data 上的增广状态轨迹
+        返回: W (len(t_data), N), 切换次数, 推进块数
+        """
+        K = len(t_data)
+        W = np.empty((K, self.N))
+        if not K: return W, 0, 0
+        dt = float(t_data[1] - t_data[0]) if K > 1 else 0.0
+        W[0] = 0.0
+        W[0, -2], W[0, -1] = t_data[0], 1.0
+        m = int(self.classify(W[0])[0])
+        k, n_sw, n_seg = 0, 0, 0
+        chunk = self.MIN_CHUNK
+        while k < K - 1:
+            L = min(chunk, K - 1 - k)
+            X = self.propagate(m, W[k], dt, L)
+            n_seg += 1
+            bad = np.flatnonzero(self.classify(X, m) != m)
+            if not len(bad):
+                W[k + 1:k + 1 + L] = X
+                k += L
+                chunk = min(chunk * 2, self.MAX_CHUNK)
+                continue
+            j = int(bad[0])
+            W[k + 1:k + 1 + j] = X[:j]
+            k += j
+            # 切换发生在 (t_k, t_k + dt] 内
+            w, m, n = self.advance(m, W[k], dt, max_switches - n_sw)
+            n_sw += n
+            k += 1
+            W[k] = w
+            chunk = self.MIN_CHUNK
+        return W, n_sw, n_seg
+
+    def signals(self, W):
+        """增广状态轨迹对应的 y, u"""
+        u = np.clip(W @ self.ku, -self.ulim, self.ulim)
+        return W @ self.cy + self._dp * u, u
+
+def _companion_batch(nums, dens):
+    """
+    批量构建伴随型实现 (所有成员阶次相同)
+    返回: A (N,n,n), B (n,), C (N,n), D (N,)
+    """
+    try:
+        dens = np.array(dens, dtype=float, ndmin=2)
+    except ValueError:
+        raise ValueError("批量仿真要求所有成员的分母阶次相同")
+    nums = [[float(c) for c in p] for p in nums]
+    N, n1 = dens.shape
+    if len(nums) != N: raise ValueError(f"分子个数({len(nums)})与分母个数({N})不一致")
+    if any(len(p) > n1 for p in nums):
+        raise ValueError(f"物理不可实现：分子阶次高于分母阶次({n1-1})")
+    scale = dens[:, -1]
+    if np.any(np.abs(scale) < 1e-12): raise ValueError("分母最高次系数不能为0")
+    num_arr = np.zeros((N, n1))
+    for i, p in enumerate(nums): num_arr[i, :len(p)] = p
+    num_arr /= scale[:, None]
+    den_arr = dens / scale[:, None]
+
+    n = n1 - 1
+    A = np.zeros((N, n, n))
+    if n > 0:
+        A[:, np.arange(n - 1), np.arange(1, n)] = 1.0
+        A[:, n - 1, :] = -den_arr[:, :-1]
+    B = np.zeros(n)
+    if n > 0: B[n - 1] = 1.0
+    D = num_arr[:, -1].copy()
+    C = num_arr[:, :-1] - den_arr[:, :-1] * D[:, None]
+    return A, B, C, D
+
+class BatchClosedLoopSimulator:
+    """
+    批量闭环仿真 (蒙特卡洛 / 参数摄动)
+    N 个同阶次的 (对象, 控制器) 组合堆叠为 (N, n) 状态数组，一次向量化推进全部成员，
+    限幅与 Clamping 抗饱和逻辑逐成员与 ClosedLoopSimulator 一致
+    method: 'zoh' -> 批量矩阵指数精确离散
+            'rk4' -> 与 RK4 单步等价的 4 阶截断 Taylor 离散矩阵
+    """
+    def __init__(self, plant_nums, plant_dens, ctrl_nums, ctrl_dens, ulim, input_type='step', method='zoh'):
+        if method not in ('rk4', 'zoh'): raise ValueError(f"批量仿真不支持的方法: {method}")
+        if input_type not in ('step', 'ramp'): raise ValueError(f"未知的输入类型: {input_type}")
+        self.Ap, self.Bp, self.Cp, self.Dp = _companion_batch(plant_nums, plant_dens)
+        self.Ac, self.Bc, self.Cc, self.Dc = _companion_batch(ctrl_nums, ctrl_dens)
+        self.N = self.Ap.shape[0]
+        if self.Ac.shape[0] != self.N: raise ValueError("对象与控制器的个数不一致")
+        self.ulim = np.broadcast_to(np.asarray(ulim, dtype=float), (self.N,)).copy()
+        if np.any(self.ulim <= 0): raise ValueError("控制量限幅值必须为正数")
+        self.input_type = input_type
+        self.method = method
+
+    def _discretize(self, A, B, dt):
+        """批量离散化: 返回 (N, n, n+1) 的 [Φ Γ]"""
+        N, n = A.shape[0], A.shape[1]
+        M = np.zeros((N, n + 1, n + 1))
+        M[:, :n, :n] = A
+        M[:, :n, n] = B
+        M *= dt
+        if self.method == 'zoh':
+            E = MatrixUtils.expm(M)
+        else:
+            E = np.broadcast_to(np.eye(n + 1), M.shape).copy()
+            term = E.copy()
+            for j in range(1, 5):
+                term = term @ M / j
+                E += term
+        return np.ascontiguousarray(E[:, :n, :])
+
+    @profiled("sim.batch_run")
+    def run(self, dt, t_end):
+        """
+        所有成员从零初始状态仿真到 t_end
+        返回: t (T,), y (N, T), u (N, T)
+        """
+        if dt <= 0: raise ValueError("仿真步长 dt 必须为正数")
+        t_data = np.arange(0, t_end, dt)
+        n_pts, N = len(t_data), self.N
+        y_data = np.empty((N, n_pts))
+        u_data = np.empty((N, n_pts))
+        r_data = t_data if self.input_type == 'ramp' else np.ones(n_pts)
+
+        npl, nct = self.Ap.shape[1], self.Ac.shape[1]
+        Mp = self._discretize(self.Ap, self.Bp, dt)
+        Mc = self._discretize(self.Ac, self.Bc, dt)
+        # 增广状态 [x; 输入]，每步一次批量矩阵-向量乘
+        Zp = np.zeros((N, npl + 1, 1))
+        Zc = np.zeros((N, nct + 1, 1))
+        xp, xc = Zp[:, :npl, 0], Zc[:, :nct, 0]
+        xc_new = np.empty((N, nct, 1))
+        Cp, Dp, Cc, Dc = self.Cp, self.Dp, self.Cc, self.Dc
+        ulim = self.ulim
+        error = np.empty(N)
+        u_raw = np.empty(N)
+        u_act = np.empty(N)
+        hold = np.empty(N, dtype=bool)
+        tmp = np.empty(N, dtype=bool)
+
+        y_curr = np.einsum('ij,ij->i', Cp, xp)
+        for k in range(n_pts):
+            np.subtract(r_data[k], y_curr, out=error)
+            np.einsum('ij,ij->i', Cc, xc, out=u_raw)
+            u_raw += Dc * error
+            np.clip(u_raw, -ulim, ulim, out=u_act)
+
+            y_data[:, k] = y_curr
+            u_data[:, k] = u_act
+
+            # Clamping 抗饱和：饱和且误差继续推向饱和方向时冻结控制器
+            np.greater(u_raw, ulim, out=hold)
+            hold &= error > 0
+            np.less(u_raw, -ulim, out=tmp)
+            tmp &= error < 0
+            hold |= tmp
+
+            if nct > 0:
+                Zc[:, nct, 0] = error
+                np.matmul(Mc, Zc, out=xc_new)
+                np.copyto(Zc[:, :nct], xc_new, where=~hold[:, None, None])
+            if npl > 0:
+                Zp[:, npl, 0] = u_act
+                Zp[:, :npl] = np.matmul(Mp, Zp)
+            y_curr = np.einsum('ij,ij->i', Cp, xp) + Dp * u_act
+
+        return t_data, y_data, u_data
 
 class PerformanceAnalyzer:
     def __init__(self, t, y, target):
-        self.t = t
-        self.y = y
+        self.t = np.asarray(t)
+        self.y = np.asarray(y)
         self.target = target
         # 使用最后 5% 的数据计算稳态，避免震荡影响
         lookback = max(1, int(len(y) * 0.05))
-        self.y_final = np.mean(y[-lookback:])
+        self.y_final = np.mean(self.y[-lookback:])
 
     def get_metrics(self, ts_tol=0.02):
-        # 1. 峰值时间 Tp
-        idx_max = np.argmax(self.y)
-        tp = self.t[idx_max]
-        
-        # 2. 超调量 OS
-        y_max = self.y[idx_max]
-        if abs(self.y_final) > 1e-9:
-            overshoot = (y_max - self.y_final) / self.y_final * 100 
-        else: 
-            overshoot = 0.0
-
-        # 3. 调节时间 Ts (倒序查找)
-        ts = 0
-        upper, lower = self.y_final*(1+ts_tol), self.y_final*(1-ts_tol)
-        in_band = True
-        for i in range(len(self.y)-1, -1, -1):
-            if self.y[i] > upper or self.y[i] < lower:
-                ts = self.t[i+1] if i+1 < len(self.t) else self.t[-1]
-                in_band = False
-                break
-        if in_band: ts = 0 
+        m = PerformanceAnalyzer.batch_metrics(self.t, self.y[None, :], self.target, ts_tol)
+        return {k: float(v[0]) for k, v in m.items()}
+
+    @staticmethod
+    @profiled("metrics")
+    def batch_metrics(t, Y, target, ts_tol=0.02):
+        """
+        向量化指标提取：Y 为 (N, T) 轨迹矩阵 (共享时间轴 t)，target 为标量或 (N,)
+        返回与 get_metrics 相同键的 dict，每项为 (N,) 数组
+        """
+        t = np.asarray(t)
+        Y = np.atleast_2d(np.asarray(Y, dtype=float))
+        N, T = Y.shape
+        rows = np.arange(N)
+        lookback = max(1, int(T * 0.05))
+        y_final = Y[:, -lookback:].mean(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 1. 峰值时间 Tp / 2. 超调量 OS
+            idx_max = np.argmax(Y, axis=1)
+            y_max = Y[rows, idx_max]
+            tp = t[idx_max]
+            overshoot = np.where(np.abs(y_final) > 1e-9, (y_max - y_final) / y_final * 100, 0.0)
+
+            # 3. 调节时间 Ts：最后一次越出误差带的下一时刻
+            upper, lower = (y_final * (1 + ts_tol))[:, None], (y_final * (1 - ts_tol))[:, None]
+            out = (Y > upper) | (Y < lower)
+            last_out = T - 1 - np.argmax(out[:, ::-1], axis=1)
+            ts = np.where(out.any(axis=1), t[np.minimum(last_out + 1, T - 1)], 0.0)
+
+            # 4. 上升时间 Tr (10% -> 90%)
+            hit10 = Y >= 0.1 * y_final[:, None]
+            hit90 = Y >= 0.9 * y_final[:, None]
+            idx_10, idx_90 = np.argmax(hit10, axis=1), np.argmax(hit90, axis=1)
+            ok = (np.abs(y_final) > 1e-6) & hit10.any(axis=1) & hit90.any(axis=1) & (idx_90 > idx_10)
+            tr = np.where(ok, t[idx_90] - t[idx_10], 0.0)
 
-        # 4. 上升时间 Tr (10% -> 90%) 
-        tr = 0.0
-        if abs(self.y_final) > 1e-6:
-            # 找到第一个大于 10% 的点
-            idx_10_list = np.where(self.y >= 0.1 * self.y_final)[0]
-            # 找到第一个大于 90% 的点
-            idx_90_list = np.where(self.y >= 0.9 * self.y_final)[0]
-            
-            if len(idx_10_list) > 0 and len(idx_90_list) > 0:
-                idx_10 = idx_10_list[0]
-                idx_90 = idx_90_list[0]
-                if idx_90 > idx_10:
-                    tr = self.t[idx_90] - self.t[idx_10]
-        
         return {
-            "steady_val": self.y_final, 
-            "error": abs(self.target - self.y[-1]),
-            "overshoot": overshoot, 
-            "ts": ts, 
+            "steady_val": y_final,
+            "error": np.abs(np.asarray(target) - Y[:, -1]),
+            "overshoot": overshoot,
+            "ts": ts,
             "tp": tp,
-            "tr": tr  # 新增返回 tr
-        }
\ No newline at end of file
+            "tr": tr,
+        }
+
+class StreamingPerformanceAnalyzer:
+    """
+    在线指标分析器：仿真过程中分块喂入 (t, y)，增量维护峰值、上升时间与调节带状态，
+    仿真结束即可得到与 PerformanceAnalyzer 相同键的指标
+    上升/调节阈值以预期稳态值 y_ref (默认 target) 为基准；若实际稳态值与之不符，
+    exact 为 False，此时应改用 PerformanceAnalyzer 离线计算
+    """
+    def __init__(self, target, n_total, ts_tol=0.02, y_ref=None):
+        self.target = target
+        self.ts_tol = ts_tol
+        self.y_ref = float(target if y_ref is None else y_ref)
+        self._tail_start = n_total - max(1, int(n_total * 0.05))
+        self.count = 0
+        self.y_max, self.tp = -np.inf, 0.0
+        self._idx_10 = self._idx_90 = None
+        self._t_10 = self._t_90 = 0.0
+        self._ts = 0.0
+        self._ts_pending = False
+        self._tail_sum, self._tail_n = 0.0, 0
+        self._t_last, self._y_last = 0.0, 0.0
+
+    def update(self, t, y):
+        """喂入下一段连续数据 (标量或一维数组)"""
+        t, y = np.atleast_1d(t), np.atleast_1d(y)
+        n = len(y)
+        if n == 0: return
+        k0 = self.count
+        y_ref, tol = self.y_ref, self.ts_tol
+
+        i = int(np.argmax(y))
+        if y[i] > self.y_max:
+            self.y_max, self.tp = float(y[i]), float(t[i])
+
+        if self._idx_10 is None:
+            hit = np.flatnonzero(y >= 0.1 * y_ref)
+            if len(hit): self._idx_10, self._t_10 = k0 + hit[0], float(t[hit[0]])
+        if self._idx_90 is None:
+            hit = np.flatnonzero(y >= 0.9 * y_ref)
+            if len(hit): self._idx_90, self._t_90 = k0 + hit[0], float(t[hit[0]])
+
+        # 上一段末尾越出误差带：调节时间为本段第一个时刻
+        if self._ts_pending:
+            self._ts, self._ts_pending = float(t[0]), False
+        out = np.flatnonzero((y > y_ref * (1 + tol)) | (y < y_ref * (1 - tol)))
+        if len(out):
+            last = out[-1]
+            if last + 1 < n: self._ts = float(t[last + 1])
+            else: self._ts, self._ts_pending = float(t[last]), True
+
+        j = max(0, self._tail_start - k0)
+        if j < n:
+            self._tail_sum += float(np.sum(y[j:]))
+            self._tail_n += n - j
+
+        self.count += n
+        self._t_last, self._y_last = float(t[-1]), float(y[-1])
+
+    @property
+    def y_final(self):
+        return self._tail_sum / self._tail_n if self._tail_n else self._y_last
+
+    @property
+    def exact(self):
+        """实际稳态值与阈值基准一致时，在线结果与离线结果相同"""
+        return abs(self.y_final - self.y_ref) <= 1e-9 * max(1.0, abs(self.y_ref))
+
+    def get_metrics(self):
+        y_final = self.y_final
+        overshoot = (self.y_max - y_final) / y_final * 100 if abs(y_final) > 1e-9 else 0.0
+        tr = 0.0
+        if abs(self.y_ref) > 1e-6 and self._idx_10 is not None and self._idx_90 is not None \
+                and self._idx_90 > self._idx_10:
+            tr = self._t_90 - self._t_10
+        return {
+            "steady_val": y_final,
+            "error": abs(self.target - self._y_last),
+            "overshoot": overshoot,
+            "ts": self._ts,
+            "tp": self.tp,
+            "tr": tr,
+        }
@@ -0,0 +1,137 @@
+"""
+设计空间并行扫描：MP × Ts × 输入类型
+每个网格点执行 设计 → 仿真 → 指标 流水线，多进程并行，结果边完成边分块写入 CSV
+
+用法示例:
+    python sweep.py --num 10 --den "0 1 1" --mp 5:20:4 --ts 1:4:7 --input step ramp --out sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+
+import numpy as np
+from pipeline import evaluate_design
+from result_cache import get_cache
+
+SWEEP_FIELDS = [
+    "mp", "ts", "input_type", "status", "message",
+    "zeta", "wn", "stable", "overshoot", "ts_sim", "tr", "tp", "ess",
+    "u_peak", "sat_ratio", "t_stop", "accepted",
+]
+
+# 验收条件：超调量允许绝对误差(%)、调节时间允许相对误差、允许的饱和时间占比
+DEFAULT_CRITERIA = {"os_tol": 2.0, "ts_tol": 0.2, "max_sat_ratio": 0.05}
+
+def evaluate_spec(num, den, mp, ts, input_type='step', ulim=1000.0, criteria=None, cache_dir=None):
+    """
+    单个网格点：返回一行结果 (设计失败记录为 status='error'，不抛出异常)
+    cache_dir: 结果缓存目录，重复扫描相同网格点时直接读取
+    """
+    crit = dict(DEFAULT_CRITERIA, **(criteria or {}))
+    row = {k: "" for k in SWEEP_FIELDS}
+    row.update(mp=mp, ts=ts, input_type=input_type)
+    try:
+        # 扫描中多数设计很快稳定，启用提前终止
+        res = evaluate_design(num, den, mp, ts, input_type, ulim, early_stop=True, cache=get_cache(cache_dir))
+    except Exception as e:
+        row.update(status="error", message=str(e).replace("\n", " "), accepted=False)
+        return row
+
+    m = res["metrics"]
+    row.update(
+        status="ok", zeta=res["zeta"], wn=res["wn"], stable=res["stable"],
+        overshoot=m["overshoot"], ts_sim=m["ts"], tr=m["tr"], tp=m["tp"], ess=m["error"],
+        u_peak=m["u_peak"], sat_ratio=m["sat_ratio"], t_stop=res["t_stop"],
+    )
+    accepted = res["stable"] and m["sat_ratio"] <= crit["max_sat_ratio"]
+    if input_type == 'step':
+        accepted = accepted and m["overshoot"] <= mp + crit["os_tol"] \
+            and m["ts"] <= ts * (1.0 + crit["ts_tol"])
+    row["accepted"] = bool(accepted)
+    return row
+
+def _evaluate_job(job):
+    return evaluate_spec(*job)
+
+def iter_sweep(num, den, mp_values, ts_values, input_types=('step',), ulim=1000.0,
+               criteria=None, workers=None, cache_dir=None):
+    """按完成顺序逐行产出扫描结果；workers=1 时在当前进程内顺序执行"""
+    jobs = [(num, den, mp, ts, it, ulim, criteria, cache_dir)
+            for it, mp, ts in itertools.product(input_types, mp_values, ts_values)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for job in jobs: yield _evaluate_job(job)
+        return
+    # 进程池模块只在并行时导入 (单进程调用保持快速启动)
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_evaluate_job, job) for job in jobs]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+def run_sweep(num, den, mp_values, ts_values, input_types=('step',), ulim=1000.0,
+              out_path=None, criteria=None, workers=None, chunk_size=64, cache_dir=None):
+    """
+    并行扫描设计空间
+    out_path 不为空时，结果每累计 chunk_size 行写入一次 CSV (已完成的结果不会因中断丢失)
+    返回: 全部结果行 (list of dict)
+    """
+    rows, pending = [], []
+    f = open(out_path, "w", newline="", encoding="utf-8") if out_path else None
+    try:
+        writer = None
+        if f:
+            writer = csv.DictWriter(f, fieldnames=SWEEP_FIELDS)
+            writer.writeheader()
+        for row in iter_sweep(num, den, mp_values, ts_values, input_types, ulim, criteria, workers, cache_dir):
+            rows.append(row)
+            pending.append(row)
+            if writer and len(pending) >= chunk_size:
+                writer.writerows(pending)
+                f.flush()
+                pending.clear()
+        if writer and pending:
+            writer.writerows(pending)
+    finally:
+        if f: f.close()
+    return rows
+
+def parse_grid(tokens):
+    """网格参数解析：'a:b:n' 表示 linspace(a, b, n)，其余按单个数值处理"""
+    values = []
+    for tok in tokens:
+        if ":" in tok:
+            a, b, n = tok.split(":")
+            values.extend(np.linspace(float(a), float(b), int(n)).tolist())
+        else:
+            values.append(float(tok))
+    return values
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SISO 控制器设计空间并行扫描")
+    parser.add_argument("--num", required=True, help="分子系数[升幂]，空格或逗号分隔")
+    parser.add_argument("--den", required=True, help="分母系数[升幂]，空格或逗号分隔")
+    parser.add_argument("--mp", nargs="+", required=True, help="超调量MP(%%)，支持 a:b:n 网格")
+    parser.add_argument("--ts", nargs="+", required=True, help="调节时间Ts(s)，支持 a:b:n 网格")
+    parser.add_argument("--input", nargs="+", default=["step"], choices=["step", "ramp"])
+    parser.add_argument("--ulim", type=float, default=1000.0, help="控制量限幅")
+    parser.add_argument("--out", default="sweep.csv", help="结果 CSV 路径")
+    parser.add_argument("--workers", type=int, default=None, help="进程数 (默认 CPU 核数)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="每次写盘的行数")
+    parser.add_argument("--cache-dir", default=None, help="结果缓存目录 (重复扫描时复用)")
+    args = parser.parse_args(argv)
+
+    num = [float(x) for x in args.num.replace(',', ' ').split()]
+    den = [float(x) for x in args.den.replace(',', ' ').split()]
+    rows = run_sweep(num, den, parse_grid(args.mp), parse_grid(args.ts), args.input, args.ulim,
+                     out_path=args.out, workers=args.workers, chunk_size=args.chunk_size,
+                     cache_dir=args.cache_dir)
+    n_ok = sum(r["status"] == "ok" for r in rows)
+    n_acc = sum(r["accepted"] is True for r in rows)
+    print(f"完成 {len(rows)} 个设计点：成功 {n_ok}，失败 {len(rows) - n_ok}，满足指标 {n_acc} -> {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
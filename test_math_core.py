@@ -0,0 +1,16 @@
+import numpy as np
+from math_core import Polynomial
+
+
+def test_trim_zero_eps_drops_exact_zeros():
+    assert Polynomial([1, 2, 0]).trim(0.0).tolist() == [1.0, 2.0]
+
+
+def test_trim_keeps_constant_term():
+    assert Polynomial([0, 0, 0]).trim(0.0).tolist() == [0.0]
+
+
+def test_trim_default_eps():
+    p = Polynomial([1.0, 2.0, 1e-12]).trim()
+    assert p.tolist() == [1.0, 2.0]
+    assert np.allclose(Polynomial([3.0, 1e-6]).trim().c, [3.0, 1e-6])